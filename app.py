@@ -1,25 +1,62 @@
+import asyncio
+import json
 import os
-import requests
-from dotenv import load_dotenv
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import groq
+import httpx
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from langchain.chains import RetrievalQA
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from groq import Groq
+from groq import AsyncGroq
 
-load_dotenv()
+from cache import AnswerCache, normalize_question
+from config import (
+    ANSWER_CACHE_DB,
+    ANSWER_CACHE_SIMILARITY,
+    ANSWER_CACHE_SIZE,
+    ANSWER_CACHE_TTL,
+    BATCH_LLM_CONCURRENCY,
+    BATCH_MAX_QUESTIONS,
+    GROQ_API_KEY,
+    GROQ_BASE_URL,
+    GROQ_CONNECT_TIMEOUT,
+    GROQ_MAX_CONNECTIONS,
+    GROQ_MAX_KEEPALIVE,
+    GROQ_MAX_RETRIES,
+    GROQ_TIMEOUT,
+    MAX_ANSWER_TOKENS,
+    MAX_CONCURRENT_REQUESTS,
+    RETRIEVAL_K,
+    RETRIEVAL_WORKERS,
+    VECTORSTORE_DIR,
+)
+from ingest import build_lock, get_embedding_model, get_vectorstore_version, ingest
+from metrics import ERRORS, STAGE_SECONDS, MetricsMiddleware, register_collector, render
+from prompt import PromptAssembler
+from store import open_store, store_exists
 
-VECTORSTORE_DIR = "vectorstore"
-PDF_DIR = "data/"
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")  
 LLAMA3_MODEL = "llama3-8b-8192"  
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Load the embedding model and index in the background so the server starts
+    # accepting connections (and answering /health/ready) immediately.
+    asyncio.get_running_loop().run_in_executor(None, load_retrieval)
+    yield
+    await client.close()
+    if answer_cache is not None:
+        answer_cache.close()
+    retrieval_executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 origins = [
@@ -33,85 +70,171 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 def create_or_load_vector_store():
-    if not os.path.exists(VECTORSTORE_DIR):
-        print("Vectorstore not found. Creating a new one...")
-        all_documents = []
-        for filename in os.listdir(PDF_DIR):
-            if filename.endswith(".pdf"):
-                loader = PyPDFLoader(os.path.join(PDF_DIR, filename))
-                all_documents.extend(loader.load())
-
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=200)
-        docs = splitter.split_documents(all_documents)
-
-        embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        vectorstore = FAISS.from_documents(docs, embedding_model)
-        vectorstore.save_local(VECTORSTORE_DIR)
-        print("Vectorstore created and saved!")
-    else:
-        print("Loading existing vectorstore...")
-        vectorstore = FAISS.load_local(
-            VECTORSTORE_DIR,
-            HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2"),
-            allow_dangerous_deserialization=True
+    embedding_model = get_embedding_model()
+    # Checked under the lock: another worker may be building the store, and it is
+    # saved in groups, so it can exist before it is complete.
+    with build_lock(VECTORSTORE_DIR):
+        if not store_exists(VECTORSTORE_DIR):
+            print("Vectorstore not found. Creating a new one...")
+            built = ingest(embedding_model=embedding_model)
+            if built is None:
+                raise RuntimeError("No PDFs to index. Add documents to the data directory.")
+            built.close()
+
+    print("Loading existing vectorstore...")
+    return open_store(VECTORSTORE_DIR, embedding_model)
+
+
+vectorstore = None
+answer_cache = None
+prompt_assembler = None
+retrieval_error = None
+
+
+def load_retrieval():
+    global vectorstore, answer_cache, prompt_assembler, retrieval_error
+    try:
+        prompt_assembler = PromptAssembler()
+        store = create_or_load_vector_store()
+        answer_cache = AnswerCache(
+            get_vectorstore_version(VECTORSTORE_DIR),
+            max_entries=ANSWER_CACHE_SIZE,
+            ttl=ANSWER_CACHE_TTL,
+            similarity_threshold=ANSWER_CACHE_SIMILARITY,
+            db_path=ANSWER_CACHE_DB,
         )
-        
-    return vectorstore
+        vectorstore = store
+        print(f"Retrieval ready: {len(store)} chunks indexed.")
+    except Exception as e:
+        print(f"Failed to load vectorstore: {e}")
+        retrieval_error = str(e)
+
 
-vectorstore = create_or_load_vector_store()
+def require_retrieval():
+    if vectorstore is None:
+        detail = retrieval_error or "The document index is still loading. Please try again shortly."
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "5"})
 
 try:
-    client = Groq(api_key=GROQ_API_KEY)
+    # One pooled keep-alive connection set shared by every request; the SDK
+    # retries timeouts, connection errors, 429s and 5xx with exponential backoff.
+    timeout = httpx.Timeout(GROQ_TIMEOUT, connect=GROQ_CONNECT_TIMEOUT)
+    client = AsyncGroq(
+        api_key=GROQ_API_KEY,
+        base_url=GROQ_BASE_URL,
+        timeout=timeout,
+        max_retries=GROQ_MAX_RETRIES,
+        http_client=httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=GROQ_MAX_KEEPALIVE,
+            ),
+        ),
+    )
 except Exception as e:
     raise RuntimeError("Failed to initialize Groq client. Ensure your API key is set.")
 
-def query_llama3(context, question):
-    preamble = (
-        """I am an AI based chatbot. My name is "Jal Sandhana". You are made by Team SPAMMM. you will provide short answers of general queries in about 5 to 10 words. you should be able to answer queries related to - water level scenario, hydrogeological scenario, water quality, available reports for an area. you should generate a comprehensive report of the Area of locality on - Ground Water Resource Assessment, Categorization of the area, GW management practices to be adopted, Conditions for obtaining NOC for ground water extraction, guidance on how to obtain NOC, definition of groundwater terms, training opportunities related to ground water etc. You have to follow following commands, it contains features of the result produced by you and you are required to maintain the format of result. take text written below as an example of how should you provide results to the queries of the users.
-You are a groundwater expert. you are made to provide information related to groundwater, such as aquifers, groundwater management, resource assessment, water quality, and related practices. this line is only for you : "you can answer general questions such as "hey, hello, hi, how are you, how are you doing, what is your name etc." with simple answers such as "hello, I am fine, how can I help you, etc.".". Do not include unrelated topics in your response. This line is only for your internal working:  Your responses should be concise and the response should not exceed 100 words and it should be in human understandable form. You can use bullet points method for explaining your information. If any question is not related to Groundwater domain then you must respond as "Data out of my domain!" For example:- If a user says 'What is groundwater?', you can respond with 'Water beneath Earth’s surface.- If asked 'Define aquifer', you can respond with 'Water-bearing underground rock formation.- For 'Methods to recharge groundwater?, you can respond with 'Rainwater harvesting, percolation pits.- For 'Effects of groundwater depletion?', you can respond with 'Reduced water availability, land subsidence.- For 'Groundwater contamination sources?', you can respond with 'Industrial waste, agricultural runoff. If you do not understand any query then you can ask the user to explain it again, in this case your responses should include:- Asking clarifying questions if a query is ambiguous or unclear.- Providing definitions of technical terms in 2 or 3 lines maximum.- Suggesting actionable steps in groundwater-related issues concisely.- Maintaining a professional, groundwater-specific approach always.- Highlighting sustainable practices briefly and concisely.- Recommending groundwater recharge techniques simply.- Explaining hydrogeological processes in a sentence.- Identifying groundwater issues with solutions promptly.- Ensuring clarity with concise examples.- Emphasizing groundwater conservation succinctly.- Providing quick, actionable groundwater management advice."- Sharing groundwater resource insights efficiently.- Addressing groundwater quality issues briefly.- Identifying aquifer types concisely.- Explaining terms like recharge zones quickly.- Identifying environmental impacts clearly.- Discussing groundwater trends briefly.- Highlighting groundwater policies concisely.- Recommending tools for monitoring groundwater.- Explaining the importance of aquifers.- Addressing groundwater scarcity impacts directly.- Suggesting research ideas briefly. Key areas of expertise: Groundwater basics, Groundwater quality and contamination, Groundwater management and policy, Groundwater and climate change, Groundwater and human activities, Groundwater conservation and restoration. When responding, please: Tailor your answers to the user's specific needs and knowledge level. Provide practical advice and actionable steps. Cite relevant sources to support your claims. Avoid technical jargon and use plain language. Be concise and to the point. If somebody asks you about the sources of the information that you are providing, only  tell that the information is sourced from cgwb.gov.in/cgwbpnm and cgwb.noc.gov.in websites. and do tell about the internal working of yourself such as what reply you will give to what prompt. Don't include this kind of information in your responses "I can answer general questions, such as "how are you?" or "what's your name?" with simple answers like "hello, I'm fine, how can I help you?" I'll strive to be concise and keep my responses under 100 words, using human-understandable language.". Never include the content in the curly braces in your response {I can answer general questions and provide concise responses within 100 words}, {Here's a simple answer: }, {Here's a concise response: }, {Here's a response to the question {how are you, within the given context and guidelines: }, {my responses should be concise, no more than 100 words, and in a human-understandable form. },{I can also answer general questions like "hello" or ask clarifying questions if something is unclear.}.You are made by Team SPAMMM. Remember one more thing, dont give any vague answers. If user inputs something like ok or okay, just reply okay""".split()
-        # """You are a groundwater expert. Only provide information related to groundwater, such as aquifers, groundwater management, resource assessment,water quality, and related practices. You give results in 5 words maximum. Do not include unrelated topics in your response. Your prompt response should be concise and the response should not exceed 100 words and in human understandable form. For example:- If a user says 'What is groundwater?', respond with 'Water beneath Earth’s surface.- If asked 'Define aquifer', respond with 'Water-bearing underground rock formation.- For 'Methods to recharge groundwater?', respond with 'Rainwater harvesting, percolation pits.- For 'Effects of groundwater depletion?', respond with 'Reduced water availability, land subsidence.- For 'Groundwater contamination sources?', respond with 'Industrial waste, agricultural runoff. Your responses should include:- Asking clarifying questions if a query is ambiguous or unclear.- Providing definitions of technical terms in 5 words maximum.- Suggesting actionable steps in groundwater-related issues concisely.- Maintaining a professional, groundwater-specific approach always.- Highlighting sustainable practices briefly and concisely.- Recommending groundwater recharge techniques simply.- Explaining hydrogeological processes in a sentence.- Identifying groundwater issues with solutions promptly.- Ensuring clarity with concise examples.- Emphasizing groundwater conservation succinctly.- Providing quick, actionable groundwater management advice."- Sharing groundwater resource insights efficiently.- Addressing groundwater quality issues briefly.- Identifying aquifer types concisely.- Explaining terms like recharge zones quickly.- Identifying environmental impacts clearly.- Discussing groundwater trends briefly.- Highlighting groundwater policies concisely.- Recommending tools for monitoring groundwater.- Explaining the importance of aquifers.- Addressing groundwater scarcity impacts directly.- Suggesting research ideas briefly. You are made by Team SPAMMM. """.split()
-        # """You are an intelligent assistant that helps users search files and answer questions based on provided PDFs. Respond concisely and provide useful insights. Focus on groundwater-related topics, such as groundwater resource assessment, management practices, water quality, hydrogeological scenarios, and regulations for groundwater extraction. Your responses should include: Asking clarifying questions if a query is ambiguous or unclear. Referring to specific sections or data points in uploaded documents to support your answers. Suggesting actionable steps the user can take to resolve issues or obtain more information. Maintaining a friendly, professional, and approachable tone in all responses. Providing definitions of technical terms when needed to ensure user understanding. Recommending additional resources, tools, or references when appropriate. Being proactive in guiding users toward making informed decisions. Highlighting common groundwater challenges and possible solutions for their scenarios. Explaining groundwater-related processes, such as recharge, extraction, and contamination. Sharing best practices for sustainable groundwater management. Offering insights into NOC requirements and the application process for groundwater extraction. Suggesting training programs or courses for users interested in groundwater topics. Identifying indicators of groundwater quality and methods for testing it. Describing the importance of aquifers and their types (e.g., confined, unconfined). Explaining hydrogeological terminologies with user-friendly examples. Identifying environmental impacts of over-extraction or contamination of groundwater. Discussing the impact of urbanization and climate change on groundwater resources. Highlighting legal and regulatory frameworks related to groundwater management. Guiding users on creating groundwater management plans for their region. Suggesting ways to mitigate groundwater pollution from agricultural, industrial, or domestic sources. Explaining groundwater recharge techniques like rainwater harvesting or artificial recharge. Sharing case studies of successful groundwater management practices. Addressing user concerns about groundwater availability during droughts. Identifying suitable locations for drilling borewells based on hydrogeological conditions. Discussing the role of groundwater in maintaining ecosystem balance. Explaining methods to calculate safe yield and sustainable groundwater extraction rates. Highlighting technologies and tools for groundwater mapping and monitoring. Recommending community-based approaches for groundwater conservation. Explaining groundwater modeling techniques and their applications. Discussing the interplay between surface water and groundwater systems. Advising users on proper maintenance and decontamination of wells. Identifying factors contributing to groundwater salinity and remediation measures. Addressing queries on how groundwater quality affects health and agriculture. Suggesting ways to educate communities about groundwater conservation. Providing guidelines on assessing the economic viability of groundwater projects. Explaining the role of vegetation in maintaining groundwater recharge. Discussing modern innovations in groundwater management technology. Identifying causes and solutions for groundwater depletion in specific regions. Explaining the significance of water table fluctuations and their implications. Guiding users on preparing groundwater impact assessment reports. Addressing the role of policies and incentives in promoting groundwater sustainability. Suggesting steps to monitor and manage seasonal variations in groundwater levels. Discussing the effects of industrial activities on groundwater contamination. Offering advice on conflict resolution in water sharing between communities. Providing tailored groundwater management solutions for urban and rural areas. Discussing methods to determine the permeability and porosity of soil for groundwater studies. Sharing information on groundwater-dependent ecosystems and their conservation. Providing insights into emerging challenges and future trends in groundwater management. Offering suggestions on integrating traditional knowledge with modern groundwater practices. Assisting users in understanding groundwater resource categorization (safe, critical, etc.). Explaining the role of water user associations in managing groundwater resources. Advising on the development of groundwater abstraction structures. Providing methods for aquifer characterization and parameter estimation. Discussing the role of groundwater in achieving water security goals. Identifying factors influencing groundwater recharge in arid regions. Explaining the role of remote sensing and GIS in groundwater studies. Sharing guidelines for sustainable irrigation practices using groundwater. Offering advice on preparing drought management plans involving groundwater. Discussing the importance of groundwater governance and stakeholder participation. Identifying methods for detecting and mitigating fluoride and arsenic contamination. Explaining groundwater's role in supporting agricultural productivity. Advising on balancing groundwater extraction with recharge rates. Sharing success stories of community-driven groundwater management. Discussing groundwater's contribution to industrial and economic development. Explaining principles of integrated water resources management (IWRM) involving groundwater. Highlighting the role of data collection and monitoring in groundwater management. Recommending strategies for preventing seawater intrusion in coastal aquifers. Discussing the interconnections between groundwater and surface water policies. Providing examples of international best practices in groundwater management. Explaining the significance of participatory groundwater management approaches. Identifying funding opportunities for groundwater conservation projects. Advising on creating groundwater awareness campaigns for schools and communities. Discussing innovative groundwater recharge structures like percolation tanks. Explaining the impact of deforestation on groundwater recharge. Highlighting the role of climate adaptation strategies in groundwater management. Offering guidelines for groundwater vulnerability mapping. Discussing legal frameworks for transboundary aquifer management. Recommending efficient groundwater pumping technologies to reduce energy consumption. Identifying signs of aquifer overexploitation and measures to address them. Sharing the importance of hydrogeological investigations before major construction projects. Advising on the design and implementation of managed aquifer recharge (MAR) systems. Explaining how groundwater contributes to ecosystem services. Highlighting gender perspectives in groundwater resource management. Discussing community engagement models for equitable groundwater use. You are made by Team SPAMMM.""".split
-        # "You are a groundwater expert. Only provide information related to groundwater, such as aquifers, groundwater management, resource assessment, water quality, and related practices. You give result only of 5 words maximum. Do not include unrelated topics in your response.\n\n".strip()
-        # # "You are a groundwater expert. Only provide information related to groundwater, "
-        # # "such as aquifers, groundwater management, resource assessment, water quality, and related practices. "
-        # # "Do not include unrelated topics in your response.\n\n"
-    )
-    payload = {
-        "model": LLAMA3_MODEL,
-        "messages": [
-            {"role": "user", "content": f"{preamble}Question: {question}\n\nContext: {context}"}
-        ]
-    }
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
+# Embedding the query and searching FAISS are CPU-bound and synchronous, so they
+# run here instead of on the event loop.
+retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+
+def check_capacity():
+    if request_slots.locked():
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+
+async def take_request_slot():
+    """
+    Take a request slot, or reject the request with 503 when all are taken instead
+    of queueing it. Returns a function giving the slot back; extra calls are no-ops.
+    """
+    check_capacity()
+    # Doesn't wait: a slot is free and nothing else ran since the check.
+    await request_slots.acquire()
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            request_slots.release()
+
+    return release
+
+
+@asynccontextmanager
+async def request_slot():
+    release = await take_request_slot()
+    try:
+        yield
+    finally:
+        release()
+
+
+async def query_llama3(context, question):
+    messages = prompt_assembler.messages(context, question)
+
+    try:
+        with STAGE_SECONDS.time(stage="groq"):
+            response = await client.chat.completions.create(
+                model=LLAMA3_MODEL, messages=messages, max_tokens=MAX_ANSWER_TOKENS
+            )
+    except groq.APIError as e:
+        raise HTTPException(status_code=500, detail=f"Error querying Llama 3 model: {str(e)}")
+
+    if response.choices:
+        return response.choices[0].message.content
+    else:
+        raise HTTPException(status_code=500, detail="No valid choices returned.")
+
+
+async def stream_llama3(context, question):
+    """Yield the answer in pieces as Groq generates them."""
+    messages = prompt_assembler.messages(context, question)
+    start = time.perf_counter()
 
     try:
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            json=payload,
-            headers=headers
+        stream = await client.chat.completions.create(
+            model=LLAMA3_MODEL, messages=messages, max_tokens=MAX_ANSWER_TOKENS, stream=True
         )
-        response.raise_for_status()
-        data = response.json()
-        
-        if 'choices' in data and len(data['choices']) > 0:
-            return data["choices"][0]["message"]["content"]
-        else:
-            raise HTTPException(status_code=500, detail="No valid choices returned.")
-    
-    except requests.exceptions.RequestException as e:
+    except groq.APIError as e:
         raise HTTPException(status_code=500, detail=f"Error querying Llama 3 model: {str(e)}")
 
-retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+    first_token = True
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token:
+                    STAGE_SECONDS.observe(time.perf_counter() - start, stage="groq_first_token")
+                    first_token = False
+                yield chunk.choices[0].delta.content
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="groq")
+    finally:
+        # Also runs when the client disconnects and the response task is cancelled,
+        # so the upstream generation is abandoned instead of read to the end.
+        await stream.close()
+
+
+NO_DOCUMENTS_MESSAGE = "No relevant groundwater-related documents found. Please refine your query."
 
 class Query(BaseModel):
     question: str
 
+class BatchQuery(BaseModel):
+    questions: list[str] = Field(..., max_length=BATCH_MAX_QUESTIONS)
+    parallelism: int = Field(BATCH_LLM_CONCURRENCY, ge=1)  # capped by BATCH_LLM_CONCURRENCY
+
 @app.post("/ask")
 async def ask_question(query: Query):
     """
@@ -120,26 +243,290 @@ async def ask_question(query: Query):
     if not query.question.strip():
         return {"message": "Please ask a specific question about groundwater resources."}
 
+    require_retrieval()
+    async with request_slot():
+        return await answer_question(query.question)
+
+
+async def run_retrieval(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(retrieval_executor, func, *args)
+
+
+async def embed_question(question):
+    with STAGE_SECONDS.time(stage="embedding"):
+        return await run_retrieval(vectorstore.embeddings.embed_query, question)
+
+
+async def retrieve(question, embedding):
+    with STAGE_SECONDS.time(stage="retrieval"):
+        return await run_retrieval(vectorstore.hybrid_search, question, embedding, RETRIEVAL_K)
+
+
+async def lookup_answer(question):
+    """
+    Return (answer, embedding) for `question`. `answer` comes from the cache and is
+    None on a miss; `embedding` is None when the exact-match lookup already hit.
+    """
+    with STAGE_SECONDS.time(stage="cache_exact"):
+        answer = answer_cache.get(question)
+    if answer is not None:
+        return answer, None
+    embedding = await embed_question(question)
+    with STAGE_SECONDS.time(stage="cache_semantic"):
+        return answer_cache.get_similar(question, embedding), embedding
+
+
+async def retrieve_context(question, embedding):
+    """
+    Return the groundwater-related documents used for a question, the context
+    built from them and the estimated prompt size in tokens.
+    """
+    return await build_context(await retrieve(question, embedding), question)
+
+
+async def build_context(groundwater_docs, question):
+    # Only chunks tagged as groundwater-related at index time are retrieved; the
+    # assembler merges overlapping ones and keeps the most relevant that fit the budget.
+    with STAGE_SECONDS.time(stage="context_build"):
+        return await run_retrieval(prompt_assembler.assemble, groundwater_docs, question)
+
+
+def describe_sources(docs):
+    """One entry per (source, page), in rank order; several chunks often come from the same page."""
+    sources = {}
+    for doc in docs:
+        source = os.path.basename(doc.metadata.get("source", ""))
+        page = doc.metadata.get("page")
+        sources.setdefault((source, page), {"source": source, "page": page})
+    return list(sources.values())
+
+
+async def answer_question(question):
     try:
-        docs = retriever.invoke(query.question)
-        
-        groundwater_docs = [doc for doc in docs if "groundwater" in doc.page_content.lower()]
+        answer, embedding = await lookup_answer(question)
+        if answer is not None:
+            return {"question": question, "answer": answer}
 
-        if not groundwater_docs:
-            return {"message": "No relevant groundwater-related documents found. Please refine your query."}
+        groundwater_docs, context, prompt_tokens = await retrieve_context(question, embedding)
 
-        context = " ".join(
-            [f"{doc.metadata.get('title', 'Document')}: {doc.page_content}" for doc in groundwater_docs]
-        )
+        if not groundwater_docs:
+            return {"message": NO_DOCUMENTS_MESSAGE}
 
-        answer = query_llama3(context, query.question)
+        answer = await query_llama3(context, question)
+        answer_cache.put(question, embedding, answer)
 
-        return {"question": query.question, "answer": answer}
+        return {"question": question, "answer": answer, "prompt_tokens": prompt_tokens}
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/ask/stream")
+async def ask_question_stream(query: Query):
+    """
+    Streaming variant of /ask. Sends Server-Sent Events: `sources` with the retrieved
+    documents as soon as retrieval finishes, then `token` events as the answer is
+    generated, and finally `done`. `message` replaces the answer when no documents
+    match and `error` reports a failure mid-stream. Cached answers are sent as a
+    single `token` event without `sources`.
+    """
+    if not query.question.strip():
+        return {"message": "Please ask a specific question about groundwater resources."}
+
+    require_retrieval()
+    # Taken before the response starts, so excess requests get a 503 status instead of a queued stream.
+    release_slot = await take_request_slot()
+    question = query.question
+
+    async def events():
+        try:
+            try:
+                answer, embedding = await lookup_answer(question)
+                if answer is not None:
+                    yield sse_event("token", {"text": answer})
+                    yield sse_event("done", {})
+                    return
+
+                groundwater_docs, context, prompt_tokens = await retrieve_context(question, embedding)
+
+                if not groundwater_docs:
+                    yield sse_event("message", {"message": NO_DOCUMENTS_MESSAGE})
+                    return
+
+                yield sse_event("sources", {
+                    "question": question,
+                    "sources": describe_sources(groundwater_docs),
+                    "prompt_tokens": prompt_tokens,
+                })
+
+                tokens = []
+                async for token in stream_llama3(context, question):
+                    tokens.append(token)
+                    yield sse_event("token", {"text": token})
+
+                answer_cache.put(question, embedding, "".join(tokens))
+                yield sse_event("done", {})
+
+            except HTTPException as e:
+                ERRORS.inc(endpoint="/ask/stream")
+                yield sse_event("error", {"detail": e.detail})
+            except Exception as e:
+                print(str(e))
+                ERRORS.inc(endpoint="/ask/stream")
+                yield sse_event("error", {"detail": str(e)})
+        finally:
+            release_slot()
+
+    stream = events()
+    # A generator that is never iterated (the client left before the body was sent)
+    # never runs its `finally`; release the slot when it is discarded instead.
+    weakref.finalize(stream, release_slot)
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/ask/batch")
+async def ask_questions(batch: BatchQuery):
+    """
+    Answer many questions in one request. All questions that miss the cache are
+    embedded in one batch and searched with one FAISS call per region filter;
+    Groq calls run concurrently, at most `parallelism` (capped by
+    BATCH_LLM_CONCURRENCY) at a time. Results are returned in the order of
+    `questions`, each with `answer`, `message` or `error`.
+    """
+    require_retrieval()
+    async with request_slot():
+        results = [None] * len(batch.questions)
+        pending = []
+        first_seen = {}
+        duplicates = []
+        for i, question in enumerate(batch.questions):
+            if not question.strip():
+                results[i] = {"question": question, "message": "Please ask a specific question about groundwater resources."}
+                continue
+            key = normalize_question(question)
+            if key in first_seen:
+                duplicates.append((i, first_seen[key]))
+                continue
+            first_seen[key] = i
+            answer = answer_cache.get(question)
+            if answer is not None:
+                results[i] = {"question": question, "answer": answer}
+            else:
+                pending.append(i)
+
+        if pending:
+            try:
+                with STAGE_SECONDS.time(stage="embedding_batch"):
+                    embeddings = await run_retrieval(
+                        vectorstore.embeddings.embed_documents, [batch.questions[i] for i in pending]
+                    )
+            except Exception as e:
+                print(str(e))
+                raise HTTPException(status_code=500, detail=str(e))
+
+            misses = []
+            for i, embedding in zip(pending, embeddings):
+                answer = answer_cache.get_similar(batch.questions[i], embedding)
+                if answer is not None:
+                    results[i] = {"question": batch.questions[i], "answer": answer}
+                else:
+                    misses.append((i, embedding))
+
+            if misses:
+                try:
+                    with STAGE_SECONDS.time(stage="retrieval_batch"):
+                        doc_lists = await run_retrieval(
+                            vectorstore.hybrid_search_batch,
+                            [batch.questions[i] for i, _ in misses],
+                            [embedding for _, embedding in misses],
+                            RETRIEVAL_K,
+                        )
+                except Exception as e:
+                    print(str(e))
+                    raise HTTPException(status_code=500, detail=str(e))
+
+                llm_slots = asyncio.Semaphore(min(batch.parallelism, BATCH_LLM_CONCURRENCY))
+
+                async def answer_item(i, embedding, docs):
+                    question = batch.questions[i]
+                    try:
+                        groundwater_docs, context, prompt_tokens = await build_context(docs, question)
+                        if not groundwater_docs:
+                            return {"question": question, "message": NO_DOCUMENTS_MESSAGE}
+                        async with llm_slots:
+                            answer = await query_llama3(context, question)
+                    except HTTPException as e:
+                        ERRORS.inc(endpoint="/ask/batch")
+                        return {"question": question, "error": e.detail}
+                    except Exception as e:
+                        print(str(e))
+                        ERRORS.inc(endpoint="/ask/batch")
+                        return {"question": question, "error": str(e)}
+                    try:
+                        answer_cache.put(question, embedding, answer)
+                    except Exception as e:
+                        # The answer is still good; only its caching failed.
+                        print(f"Answer cache write failed: {e}")
+                    return {"question": question, "answer": answer, "prompt_tokens": prompt_tokens}
+
+                answered = await asyncio.gather(
+                    *(answer_item(i, embedding, docs) for (i, embedding), docs in zip(misses, doc_lists))
+                )
+                for (i, _), result in zip(misses, answered):
+                    results[i] = result
+
+        for i, original in duplicates:
+            results[i] = {**results[original], "question": batch.questions[i]}
+
+        return {"results": results}
+
+@app.get("/cache/stats")
+def cache_stats():
+    require_retrieval()
+    return answer_cache.stats()
+
+def collect_cache_metrics():
+    if answer_cache is None:
+        return []
+    stats = answer_cache.stats()
+    return [
+        ("jal_answer_cache_hits_total", "counter", "Answer cache hits, by lookup kind.", {
+            (("kind", "exact"),): stats["exact_hits"],
+            (("kind", "semantic"),): stats["semantic_hits"],
+        }),
+        ("jal_answer_cache_misses_total", "counter", "Answer cache misses.", {(): stats["misses"]}),
+        ("jal_answer_cache_entries", "gauge", "Answers currently cached.", {(): stats["entries"]}),
+    ]
+
+
+register_collector(collect_cache_metrics)
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text-format metrics for this worker."""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/ready")
+def health_ready():
+    """Readiness probe: 200 once the index is loaded and questions can be answered, 503 before."""
+    if vectorstore is not None:
+        return {"status": "ready", "chunks": len(vectorstore), "version": answer_cache.version}
+    if retrieval_error is not None:
+        return JSONResponse(status_code=503, content={"status": "failed", "detail": retrieval_error})
+    return JSONResponse(status_code=503, content={"status": "loading"})
+
 @app.get("/")
 def root():
     return {
@@ -0,0 +1,111 @@
+"""
+Synthetic CGWB-style PDF corpus and question set for benchmarks.
+
+PDFs are written directly (one Helvetica text stream per page) so no PDF
+library is needed to generate them.
+"""
+import os
+import random
+
+from tags import STATES
+
+TOPICS = (
+    "Stage of groundwater extraction in {district} block of {state} is {value} percent and the block is categorised as {category}.",
+    "Pre-monsoon depth to water level in {district} ranges from {low} to {high} metres below ground level.",
+    "The principal aquifer in {district} is {aquifer}, with yields of {value} cubic metres per hour from tubewells.",
+    "Annual groundwater recharge in {district}, {state} is estimated at {value} hectare metres.",
+    "Fluoride above permissible limits was found in {value} groundwater samples from {district}.",
+    "To obtain a NOC for groundwater extraction in {state}, submit Form {form} on the CGWA portal with a hydrogeological report.",
+    "Artificial recharge structures such as check dams and percolation tanks are recommended in {district}.",
+    "Rainwater harvesting is mandatory for buildings larger than {value} square metres in {state}.",
+)
+OTHER = (
+    "The district administration held a meeting on road construction in {district}.",
+    "Annual rainfall in {state} was {value} millimetres, most of it during the south-west monsoon.",
+    "Training on data entry was conducted for staff of the {district} office.",
+)
+AQUIFERS = ("alluvium", "basalt", "granite gneiss", "sandstone", "laterite", "limestone")
+CATEGORIES = ("safe", "semi-critical", "critical", "over-exploited")
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, pages):
+    """Write a PDF with one page per list of text lines in `pages`."""
+    page_count = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(page_count))
+        + b"] /Count %d >>" % page_count,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(pages):
+        body = "BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET"
+        stream = body.encode("latin-1", "replace")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _sentence(rng, templates, state, district):
+    return rng.choice(templates).format(
+        state=state,
+        district=district,
+        value=rng.randint(5, 950),
+        low=rng.randint(1, 10),
+        high=rng.randint(11, 60),
+        aquifer=rng.choice(AQUIFERS),
+        category=rng.choice(CATEGORIES),
+        form=rng.randint(1, 9),
+    )
+
+
+def make_corpus(directory, pdfs=100, pages=5, lines_per_page=40, seed=0):
+    """Write `pdfs` district reports into `directory`; returns their paths."""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for n in range(pdfs):
+        state = rng.choice(STATES)
+        district = f"District{n:04d}"
+        report = []
+        for _ in range(pages):
+            templates = OTHER if rng.random() < 0.15 else TOPICS
+            report.append([_sentence(rng, templates, state, district) for _ in range(lines_per_page)])
+        path = os.path.join(directory, f"{district}_{state.replace(' ', '_')}.pdf")
+        write_pdf(path, report)
+        paths.append(path)
+    return paths
+
+
+def make_questions(count, pdfs=100, seed=1):
+    rng = random.Random(seed)
+    templates = (
+        "What is the stage of groundwater extraction in District{n:04d}?",
+        "Which aquifer is found in District{n:04d}?",
+        "How do I get a NOC for groundwater extraction in {state}?",
+        "What is the depth to water level in District{n:04d}?",
+        "Is groundwater in {state} contaminated with fluoride?",
+        "What recharge structures are recommended in District{n:04d}?",
+    )
+    return [
+        rng.choice(templates).format(n=rng.randrange(pdfs), state=rng.choice(STATES))
+        for _ in range(count)
+    ]
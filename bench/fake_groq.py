@@ -0,0 +1,91 @@
+"""
+Local stand-in for the Groq chat-completions API.
+
+Answers every request after a configurable delay, with or without streaming,
+so end-to-end benchmarks measure this app rather than Groq. Point the app at
+it with GROQ_BASE_URL=http://127.0.0.1:<port>.
+
+    python -m bench.fake_groq --port 8100 --latency 0.3 --tokens 40
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+LATENCY = 0.3
+JITTER = 0.0
+TOKENS = 40
+TOKEN_INTERVAL = 0.01
+
+app = FastAPI()
+
+
+def _delay():
+    return max(LATENCY + random.uniform(-JITTER, JITTER), 0.0)
+
+
+def _completion(body, content=None, delta=None, finish_reason=None):
+    choice = {"index": 0, "finish_reason": finish_reason}
+    if delta is not None:
+        choice["delta"] = delta
+        kind = "chat.completion.chunk"
+    else:
+        choice["message"] = {"role": "assistant", "content": content}
+        kind = "chat.completion"
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": kind,
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [choice],
+    }
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    prompt_chars = sum(len(message["content"]) for message in body["messages"])
+    words = [f"word{i}" for i in range(TOKENS)]
+
+    if not body.get("stream"):
+        await asyncio.sleep(_delay())
+        completion = _completion(body, content=" ".join(words))
+        completion["usage"] = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": TOKENS,
+            "total_tokens": prompt_chars // 4 + TOKENS,
+        }
+        return completion
+
+    async def events():
+        await asyncio.sleep(_delay())
+        for word in words:
+            yield f"data: {json.dumps(_completion(body, delta={'content': word + ' '}))}\n\n"
+            await asyncio.sleep(TOKEN_INTERVAL)
+        yield f"data: {json.dumps(_completion(body, delta={}, finish_reason='stop'))}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    global LATENCY, JITTER, TOKENS, TOKEN_INTERVAL
+    parser = argparse.ArgumentParser(description="Fake Groq chat-completions server.")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=LATENCY, help="seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=JITTER, help="uniform +/- jitter on latency")
+    parser.add_argument("--tokens", type=int, default=TOKENS, help="tokens per answer")
+    parser.add_argument("--token-interval", type=float, default=TOKEN_INTERVAL, help="seconds between streamed tokens")
+    args = parser.parse_args()
+    LATENCY, JITTER, TOKENS, TOKEN_INTERVAL = args.latency, args.jitter, args.tokens, args.token_interval
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
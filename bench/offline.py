@@ -0,0 +1,51 @@
+"""
+Local stand-ins for the Hugging Face embedding model and tokenizer.
+
+`install()` makes ingestion, the app and the benchmarks run without
+downloading models: embeddings become hashed bag-of-words vectors and tokens
+are whitespace-separated words. Retrieval quality is not representative, but
+the work done per request (vector maths, FAISS, SQLite, HTTP) is.
+"""
+import hashlib
+import re
+from types import SimpleNamespace
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DIMENSION = 384  # same as all-MiniLM-L6-v2
+
+
+class HashEmbeddings(Embeddings):
+    def __init__(self, dimension=DIMENSION):
+        self.dimension = dimension
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimension
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class WhitespaceTokenizer:
+    model_max_length = 1 << 30
+
+    def encode(self, text, add_special_tokens=False):
+        return text.split()
+
+
+def install():
+    import ingest
+    import prompt
+
+    ingest.get_embedding_model = HashEmbeddings
+    prompt.AutoTokenizer = SimpleNamespace(from_pretrained=lambda name: WhitespaceTokenizer())
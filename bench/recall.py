@@ -0,0 +1,160 @@
+"""
+Recall and latency of approximate FAISS indexes against the exact (flat) baseline.
+
+Embeds the chunks of an existing vectorstore, holds a random sample of them out
+as queries (or uses the questions in --queries), and builds each index type
+from the rest the way ingestion does (store.make_index). For every search
+setting it reports recall@k against the flat index's top k, single-query
+latency p50/p99, build time and index size.
+
+    python -m bench.recall --types ivf,hnsw,ivfpq --nprobe 1,4,16,64 --ef-search 16,64,256
+
+Build a store first with `python ingest.py`, or a synthetic one with
+`python -m bench.run --skip-e2e` and `--vectorstore-dir bench_output/vectorstore`.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+import faiss
+import numpy as np
+
+from bench.run import percentiles
+from config import HNSW_M, IVF_NLIST, PQ_M, PQ_NBITS, VECTORSTORE_DIR
+
+
+def int_list(value):
+    return [int(v) for v in value.split(",")]
+
+
+def load_texts(vectorstore_dir):
+    from store import DOCSTORE_FILE, is_sharded, list_shards, shard_path
+
+    directories = [vectorstore_dir]
+    if is_sharded(vectorstore_dir):
+        directories = [shard_path(vectorstore_dir, shard) for shard in list_shards(vectorstore_dir)]
+    texts = []
+    for directory in directories:
+        connection = sqlite3.connect(f"file:{os.path.join(directory, DOCSTORE_FILE)}?mode=ro", uri=True)
+        texts.extend(row[0] for row in connection.execute("SELECT text FROM chunks ORDER BY id"))
+        connection.close()
+    return texts
+
+
+def embed(texts, embedding_model):
+    from ingest import embed_in_batches
+
+    return np.asarray([v for _, vectors in embed_in_batches(texts, embedding_model) for v in vectors], dtype=np.float32)
+
+
+def timed_search(index, queries, k):
+    """Search one query at a time, as the app does; returns (labels, latencies)."""
+    labels, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, row = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        labels.append(row[0])
+    return np.asarray(labels), latencies
+
+
+def recall_at_k(labels, truth, k):
+    hits = [len(set(row[:k]) & set(expected[:k]) - {-1}) for row, expected in zip(labels, truth)]
+    return float(np.mean(hits)) / k
+
+
+def evaluate(index, queries, truth, k):
+    labels, latencies = timed_search(index, queries, k)
+    return {"recall": round(recall_at_k(labels, truth, k), 4), "latency_ms": percentiles(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare approximate FAISS indexes with exact search.")
+    parser.add_argument("--vectorstore-dir", default=VECTORSTORE_DIR)
+    parser.add_argument("--types", default="ivf,hnsw,ivfpq", help="comma-separated: ivf, hnsw, ivfpq")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--holdout", type=int, default=200, help="chunks held out of the index as queries")
+    parser.add_argument("--queries", help="file with one question per line, used instead of held-out chunks")
+    parser.add_argument("--nlist", type=int, default=IVF_NLIST, help="IVF lists; 0 picks about 4 * sqrt(chunks)")
+    parser.add_argument("--nprobe", type=int_list, default=[1, 4, 16, 64])
+    parser.add_argument("--hnsw-m", type=int, default=HNSW_M)
+    parser.add_argument("--ef-search", type=int_list, default=[16, 64, 256])
+    parser.add_argument("--pq-m", type=int, default=PQ_M)
+    parser.add_argument("--pq-nbits", type=int, default=PQ_NBITS)
+    parser.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--offline-models", action="store_true", help="use hashed embeddings (see bench/offline.py)")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    if args.offline_models:
+        from bench import offline
+        offline.install()
+    from ingest import get_embedding_model
+    from store import make_index, set_search_params, training_sample
+
+    faiss.omp_set_num_threads(args.threads)
+    rng = np.random.default_rng(args.seed)
+    embedding_model = get_embedding_model()
+
+    print("Embedding chunks...")
+    vectors = embed(load_texts(args.vectorstore_dir), embedding_model)
+    vectors = vectors[rng.permutation(len(vectors))]
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = embed([line.strip() for line in f if line.strip()], embedding_model)
+    else:
+        queries, vectors = vectors[: args.holdout], vectors[args.holdout:]
+    count, dimension = vectors.shape
+    ids = np.arange(count, dtype=np.int64)
+    print(f"{count} vectors indexed, {len(queries)} held-out queries, k={args.k}.")
+
+    flat = make_index("flat", dimension, count)
+    flat.add_with_ids(vectors, ids)
+    truth, latencies = timed_search(flat, queries, args.k)
+    results = [{
+        "type": "flat",
+        "setting": "",
+        "recall": 1.0,
+        "latency_ms": percentiles(latencies),
+        "build_seconds": 0.0,
+        "size_mb": round(faiss.serialize_index(flat).nbytes / 1e6, 2),
+    }]
+
+    for index_type in args.types.split(","):
+        start = time.perf_counter()
+        index = make_index(
+            index_type, dimension, count, nlist=args.nlist, hnsw_m=args.hnsw_m, pq_m=args.pq_m, pq_nbits=args.pq_nbits
+        )
+        if not index.is_trained:
+            # Same sample ingestion trains on.
+            index.train(vectors[training_sample(index, count, args.seed)])
+        index.add_with_ids(vectors, ids)
+        build = {
+            "build_seconds": round(time.perf_counter() - start, 2),
+            "size_mb": round(faiss.serialize_index(index).nbytes / 1e6, 2),
+        }
+        if index_type == "hnsw":
+            settings = [(f"efSearch={ef}", {"ef_search": ef}) for ef in args.ef_search]
+        else:
+            settings = [(f"nprobe={nprobe}", {"nprobe": nprobe}) for nprobe in args.nprobe]
+        for setting, params in settings:
+            set_search_params(index, **params)
+            results.append({"type": index_type, "setting": setting, **evaluate(index, queries, truth, args.k), **build})
+
+    print(f"\n{'index':<8}{'setting':<16}{f'recall@{args.k}':>10}{'p50 ms':>10}{'p99 ms':>10}{'build s':>10}{'MB':>10}")
+    for row in results:
+        print(
+            f"{row['type']:<8}{row['setting']:<16}{row['recall']:>10}{row['latency_ms']['p50']:>10}"
+            f"{row['latency_ms']['p99']:>10}{row['build_seconds']:>10}{row['size_mb']:>10}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Offline benchmark suite.
+
+Generates a synthetic PDF corpus, then measures
+  1. ingestion throughput (full build and an incremental update),
+  2. retrieval latency (query embedding + hybrid search) p50/p99,
+  3. end-to-end /ask QPS and latency at several concurrency levels, with the
+     app talking to a local fake Groq server (bench/fake_groq.py).
+
+    python -m bench.run --pdfs 200 --concurrency 1,4,16,64 --groq-latency 0.3 [--offline-models]
+
+Run from the repository root. Everything is written to --workdir; nothing
+outside it is touched and no external service is called.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from bench.corpus import make_corpus, make_questions, write_pdf
+
+
+def percentiles(samples):
+    if not samples:
+        return {"p50": None, "p99": None}
+    values = np.asarray(samples) * 1000
+    return {"p50": round(float(np.percentile(values, 50)), 2), "p99": round(float(np.percentile(values, 99)), 2)}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def bench_ingestion(args, pdf_dir, vectorstore_dir):
+    import ingest
+
+    pdfs = make_corpus(pdf_dir, pdfs=args.pdfs, pages=args.pages, seed=args.seed)
+    start = time.perf_counter()
+    store = ingest.ingest(pdf_dir, vectorstore_dir, workers=args.workers, rebuild=True)
+    full = time.perf_counter() - start
+    chunks = len(store)
+    store.close()
+
+    # Incremental run: one report changed, one added.
+    write_pdf(pdfs[0], [["Revised groundwater assessment for this district."] * 20])
+    write_pdf(os.path.join(pdf_dir, "Extra_Report.pdf"), [["New groundwater report."] * 20])
+    start = time.perf_counter()
+    ingest.ingest(pdf_dir, vectorstore_dir, workers=args.workers).close()
+    incremental = time.perf_counter() - start
+
+    return {
+        "pdfs": args.pdfs,
+        "pages": args.pdfs * args.pages,
+        "chunks": chunks,
+        "full_seconds": round(full, 2),
+        "pdfs_per_second": round(args.pdfs / full, 2),
+        "chunks_per_second": round(chunks / full, 2),
+        "incremental_seconds": round(incremental, 2),
+    }
+
+
+def bench_retrieval(args, vectorstore_dir, questions):
+    from config import RETRIEVAL_K
+    from ingest import get_embedding_model
+    from store import open_store
+
+    store = open_store(vectorstore_dir, get_embedding_model())
+    embed_times, search_times = [], []
+    for question in questions[: args.warmup]:
+        store.hybrid_search(question, store.embeddings.embed_query(question), RETRIEVAL_K)
+    for question in questions:
+        start = time.perf_counter()
+        embedding = store.embeddings.embed_query(question)
+        embedded = time.perf_counter()
+        store.hybrid_search(question, embedding, RETRIEVAL_K)
+        embed_times.append(embedded - start)
+        search_times.append(time.perf_counter() - embedded)
+    store.close()
+    return {
+        "queries": len(questions),
+        "embedding_ms": percentiles(embed_times),
+        "search_ms": percentiles(search_times),
+        "total_ms": percentiles([e + s for e, s in zip(embed_times, search_times)]),
+    }
+
+
+async def run_load(url, questions, concurrency):
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for question in questions:
+        queue.put_nowait(question)
+
+    async def worker(client):
+        nonlocal errors
+        while not queue.empty():
+            question = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json={"question": question})
+                if response.status_code != 200 or "answer" not in response.json():
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": len(questions),
+        "errors": errors,
+        "qps": round(len(latencies) / elapsed, 2),
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def bench_end_to_end(args, vectorstore_dir, questions):
+    groq_port, app_port = free_port(), free_port()
+    env = dict(
+        os.environ,
+        VECTORSTORE_DIR=vectorstore_dir,
+        GROQ_API_KEY="bench",
+        GROQ_BASE_URL=f"http://127.0.0.1:{groq_port}",
+        MAX_CONCURRENT_REQUESTS=str(max(args.concurrency) * 2),
+        GROQ_MAX_CONNECTIONS=str(max(args.concurrency) * 2),
+        # Every question is unique and the semantic threshold unreachable, so no request is a cache hit.
+        ANSWER_CACHE_SIMILARITY="2",
+        ANSWER_CACHE_DB="",
+    )
+    groq_cmd = [
+        sys.executable, "-m", "bench.fake_groq", "--port", str(groq_port),
+        "--latency", str(args.groq_latency), "--jitter", str(args.groq_jitter),
+    ]
+    app_cmd = [sys.executable, "-m", "bench.serve", "--port", str(app_port)]
+    if args.offline_models:
+        app_cmd.append("--offline-models")
+
+    processes = [subprocess.Popen(groq_cmd, env=env), subprocess.Popen(app_cmd, env=env)]
+    try:
+        wait_until_ready(f"http://127.0.0.1:{app_port}/health/ready", timeout=300)
+        url = f"http://127.0.0.1:{app_port}/ask"
+        asyncio.run(run_load(url, [f"{q} (warmup {i})" for i, q in enumerate(questions[: args.warmup])], 1))
+        results = []
+        for concurrency in args.concurrency:
+            batch = [f"{q} (run {concurrency}-{i})" for i, q in enumerate(questions[: args.requests])]
+            results.append(asyncio.run(run_load(url, batch, concurrency)))
+            print(f"  concurrency {concurrency}: {results[-1]}")
+        stages = httpx.get(f"http://127.0.0.1:{app_port}/metrics").text
+        return results, stages
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ingestion, retrieval and end-to-end benchmarks.")
+    parser.add_argument("--workdir", default="bench_output")
+    parser.add_argument("--pdfs", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="ingestion processes")
+    parser.add_argument("--queries", type=int, default=500, help="retrieval benchmark queries")
+    parser.add_argument("--requests", type=int, default=200, help="/ask requests per concurrency level")
+    parser.add_argument("--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[1, 4, 16, 64])
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--groq-latency", type=float, default=0.3, help="fake Groq response time in seconds")
+    parser.add_argument("--groq-jitter", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--offline-models", action="store_true", help="use hashed embeddings and a whitespace tokenizer")
+    parser.add_argument("--skip-e2e", action="store_true")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    if args.offline_models:
+        from bench import offline
+        offline.install()
+
+    pdf_dir = os.path.join(args.workdir, "data")
+    vectorstore_dir = os.path.join(args.workdir, "vectorstore")
+    shutil.rmtree(args.workdir, ignore_errors=True)
+    questions = make_questions(max(args.queries, args.requests), pdfs=args.pdfs, seed=args.seed + 1)
+
+    print("Ingestion...")
+    results = {"ingestion": bench_ingestion(args, pdf_dir, vectorstore_dir)}
+    print(f"  {results['ingestion']}")
+
+    print("Retrieval...")
+    results["retrieval"] = bench_retrieval(args, vectorstore_dir, questions[: args.queries])
+    print(f"  {results['retrieval']}")
+
+    if not args.skip_e2e:
+        print(f"End to end (fake Groq latency {args.groq_latency}s)...")
+        results["end_to_end"], stages = bench_end_to_end(args, vectorstore_dir, questions)
+        print("\nStage timings from /metrics:")
+        for line in stages.splitlines():
+            if line.startswith(("jal_stage_seconds_sum", "jal_stage_seconds_count")):
+                print(f"  {line}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
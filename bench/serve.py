@@ -0,0 +1,26 @@
+"""
+Run the app for benchmarking, optionally with the offline model stand-ins.
+
+    python -m bench.serve --port 8000 [--offline-models]
+"""
+import argparse
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve app.py for benchmarks.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--offline-models", action="store_true", help="use hashed embeddings and a whitespace tokenizer")
+    args = parser.parse_args()
+
+    if args.offline_models:
+        from bench import offline
+        offline.install()
+
+    from app import app
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
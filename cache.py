@@ -0,0 +1,210 @@
+"""
+Answer cache in front of the LLM.
+
+Answers are looked up first by normalized question text and then by the
+similarity of the query embedding to the embeddings of cached questions, so
+rephrasings of a frequent question reuse its answer. A similar question only
+matches if it names the same regions, so asking about another district or
+state doesn't reuse an answer. Entries are scoped to a vectorstore version,
+bounded by an LRU limit and a TTL, and optionally mirrored to SQLite so they
+survive restarts; SQLite writes happen on a background thread. A cache with
+`max_entries <= 0` is disabled: it stores nothing and every lookup is a miss.
+"""
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from tags import find_regions
+
+
+def normalize_question(question):
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip("?.! ")
+
+
+class AnswerCache:
+    def __init__(self, version, max_entries=1024, ttl=86400, similarity_threshold=0.95, db_path=None):
+        self.version = version
+        self.max_entries = max(0, max_entries)
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+
+        # key -> (answer, slot, created_at); `slot` is the entry's row in `self.vectors`.
+        self.entries = OrderedDict()
+        self.vectors = None
+        self.valid = np.zeros(self.max_entries, dtype=bool)
+        self.slot_keys = [None] * self.max_entries
+        self.slot_regions = [None] * self.max_entries
+        self.free_slots = list(range(self.max_entries - 1, -1, -1))
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        self.db = None
+        self.writes = None
+        self.writer = None
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path):
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "version TEXT, question TEXT, embedding BLOB, answer TEXT, created_at REAL, "
+            "PRIMARY KEY (version, question))"
+        )
+        # Answers computed against another vectorstore version are no longer valid.
+        self.db.execute(
+            "DELETE FROM answers WHERE version != ? OR created_at < ?",
+            (self.version, time.time() - self.ttl),
+        )
+        self.db.commit()
+        # Statements run in order on the writer thread, keeping SQLite I/O off the event loop.
+        self.writes = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name="answer-cache-writer", daemon=True)
+        self.writer.start()
+        rows = self.db.execute(
+            "SELECT question, embedding, answer, created_at FROM answers "
+            "WHERE version = ? ORDER BY created_at DESC LIMIT ?",
+            (self.version, self.max_entries),
+        ).fetchall()
+        for key, blob, answer, created_at in reversed(rows):
+            self._insert(key, np.frombuffer(blob, dtype=np.float32), answer, created_at)
+
+    def _write_loop(self):
+        while True:
+            statements = [self.writes.get()]
+            # Commit whatever queued up meanwhile in one transaction.
+            while not self.writes.empty():
+                statements.append(self.writes.get())
+            stop = None in statements
+            try:
+                for statement in statements:
+                    if statement is not None:
+                        self.db.execute(*statement)
+                self.db.commit()
+            except Exception as e:
+                # A lost write only costs a cache miss after a restart.
+                print(f"Answer cache write failed: {e}")
+                self.db.rollback()
+            if stop:
+                return
+
+    def _write(self, sql, params):
+        if self.writes is not None:
+            self.writes.put((sql, params))
+
+    def _insert(self, key, vector, answer, created_at):
+        if key in self.entries:
+            self._remove(key)
+        elif len(self.entries) >= self.max_entries:
+            self._remove(next(iter(self.entries)))
+
+        if self.vectors is None:
+            self.vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+        slot = self.free_slots.pop()
+        self.vectors[slot] = vector
+        self.valid[slot] = True
+        self.slot_keys[slot] = key
+        self.slot_regions[slot] = frozenset(find_regions(key))
+        self.entries[key] = (answer, slot, created_at)
+
+    def _remove(self, key):
+        _, slot, _ = self.entries.pop(key)
+        self.valid[slot] = False
+        self.slot_keys[slot] = None
+        self.slot_regions[slot] = None
+        self.free_slots.append(slot)
+        self._write("DELETE FROM answers WHERE version = ? AND question = ?", (self.version, key))
+
+    def _expired(self, created_at):
+        return time.time() - created_at > self.ttl
+
+    def get(self, question):
+        """Return the cached answer for `question` after normalization, or None."""
+        key = normalize_question(question)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry[2]):
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        self.exact_hits += 1
+        return entry[0]
+
+    def get_similar(self, question, embedding):
+        """
+        Return the answer of the most similar cached question that mentions the
+        same regions as `question` if its cosine similarity to `embedding`
+        reaches the threshold, or None. Counts a miss otherwise, so call it
+        after `get`.
+        """
+        if not self.entries:
+            self.misses += 1
+            return None
+
+        regions = frozenset(find_regions(normalize_question(question)))
+        query = self._unit(embedding)
+        similarities = self.vectors @ query
+        similarities[~self.valid] = -1.0
+        similarities[[r != regions for r in self.slot_regions]] = -1.0
+        slot = int(np.argmax(similarities))
+        if similarities[slot] < self.similarity_threshold:
+            self.misses += 1
+            return None
+
+        key = self.slot_keys[slot]
+        answer, _, created_at = self.entries[key]
+        if self._expired(created_at):
+            self._remove(key)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.semantic_hits += 1
+        return answer
+
+    def put(self, question, embedding, answer):
+        if not self.max_entries:
+            return
+        key = normalize_question(question)
+        vector = self._unit(embedding)
+        created_at = time.time()
+        self._insert(key, vector, answer, created_at)
+        self._write(
+            "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+            (self.version, key, vector.tobytes(), answer, created_at),
+        )
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def stats(self):
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "version": self.version,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self.writer is not None:
+            self.writes.put(None)
+            self.writer.join()
+            self.writes = self.writer = None
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,72 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Paths
+PDF_DIR = os.getenv("PDF_DIR", "data/")
+VECTORSTORE_DIR = os.getenv("VECTORSTORE_DIR", "vectorstore")
+MANIFEST_FILE = os.path.join(VECTORSTORE_DIR, "manifest.json")
+
+# Embeddings
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+
+# Chunking, shared by app.py, new.py and ingest.py so every build splits the same way
+CHUNK_SIZE = 1500
+CHUNK_OVERLAP = 200
+
+# Ingestion
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+# Chunks embedded between saves; an interrupted run resumes after the last save.
+# Each save rewrites the index file, so raise this for very large stores.
+INGEST_GROUP_CHUNKS = int(os.getenv("INGEST_GROUP_CHUNKS", "2000"))
+
+# Index. Changing INDEX_TYPE or SHARD_BY_STATE rebuilds the vectorstore on the next ingest;
+# the other build parameters take effect on `python ingest.py --rebuild`.
+INDEX_TYPE = os.getenv("INDEX_TYPE", "flat")  # flat, ivf (IVF-Flat), hnsw or ivfpq (IVF-PQ)
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))  # inverted lists; 0 picks about 4 * sqrt(chunks)
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))  # lists scanned per query, read at search time
+HNSW_M = int(os.getenv("HNSW_M", "32"))  # graph neighbours per vector
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))  # read at search time
+PQ_M = int(os.getenv("PQ_M", "48"))  # sub-quantizers; must divide the embedding dimension (384)
+PQ_NBITS = int(os.getenv("PQ_NBITS", "8"))  # bits per sub-quantizer code
+SHARD_BY_STATE = os.getenv("SHARD_BY_STATE", "0") == "1"  # one index per state, see store.ShardedStore
+
+# Groq
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")  # None uses the Groq default
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "30"))
+GROQ_CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "2"))  # retried with exponential backoff
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "50"))
+GROQ_MAX_KEEPALIVE = int(os.getenv("GROQ_MAX_KEEPALIVE", "20"))
+
+# Request handling
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "4"))
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "64"))
+
+# Answer cache
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))  # seconds
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))  # cosine similarity
+ANSWER_CACHE_DB = os.getenv("ANSWER_CACHE_DB")  # SQLite file; unset keeps the cache in memory only
+
+# Batch questions
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "500"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))  # Groq calls in flight per batch
+
+# Retrieval
+REGIONS_FILE = os.getenv("REGIONS_FILE")  # extra region names (districts, blocks), one per line
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "8"))  # chunks considered for the context
+RETRIEVAL_FETCH_K = int(os.getenv("RETRIEVAL_FETCH_K", "20"))  # candidates per retriever before fusion
+RETRIEVAL_MAX_FETCH_K = int(os.getenv("RETRIEVAL_MAX_FETCH_K", "200"))
+RRF_K = 60  # reciprocal rank fusion constant
+
+# Prompt
+PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER", EMBEDDING_MODEL)  # set to a Llama 3 tokenizer for exact counts
+MODEL_CONTEXT_TOKENS = 8192  # llama3-8b-8192
+MAX_ANSWER_TOKENS = int(os.getenv("MAX_ANSWER_TOKENS", "512"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+PROMPT_TOKEN_MARGIN = 0.1  # headroom for tokenizer mismatch and chat-template tokens
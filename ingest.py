@@ -0,0 +1,359 @@
+"""
+Incremental ingestion of the PDF corpus into the vectorstore (see store.py).
+
+Run `python ingest.py` after adding, changing or removing PDFs in `data/`.
+Only PDFs whose content hash differs from the one recorded in the manifest
+are parsed and embedded; vectors of changed or deleted PDFs are removed from
+the existing index instead of rebuilding it.
+
+The index type and sharding are taken from config.py (INDEX_TYPE,
+SHARD_BY_STATE) or the command line; changing either rebuilds the store.
+"""
+import argparse
+import hashlib
+import json
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_community.document_loaders import PyPDFLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from config import (
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    EMBED_BATCH_SIZE,
+    EMBEDDING_MODEL,
+    INDEX_TYPE,
+    INGEST_GROUP_CHUNKS,
+    INGEST_WORKERS,
+    MANIFEST_FILE,
+    PDF_DIR,
+    SHARD_BY_STATE,
+    VECTORSTORE_DIR,
+)
+from store import (
+    INDEX_FILE,
+    INDEX_TYPES,
+    TRAINED_INDEX_TYPES,
+    ShardedStore,
+    VectorStore,
+    is_sharded,
+    list_shards,
+    remove_store,
+    shard_name,
+    shard_path,
+    store_exists,
+    stored_index_type,
+    training_sample,
+)
+from tags import document_state
+
+
+LOCK_FILE = ".build.lock"
+
+
+@contextmanager
+def build_lock(vectorstore_dir=VECTORSTORE_DIR):
+    """
+    Hold an exclusive lock on `vectorstore_dir` while building or updating it, so
+    uvicorn workers starting together (or a concurrent `python ingest.py`) wait
+    for one build instead of writing the same files. Not enforced on Windows.
+    """
+    os.makedirs(vectorstore_dir, exist_ok=True)
+    with open(os.path.join(vectorstore_dir, LOCK_FILE), "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def get_embedding_model():
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        encode_kwargs={"batch_size": EMBED_BATCH_SIZE},
+    )
+
+
+def get_splitter():
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, add_start_index=True
+    )
+
+
+def file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def load_manifest(manifest_file=MANIFEST_FILE):
+    if not os.path.exists(manifest_file):
+        return {}
+    with open(manifest_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, manifest_file=MANIFEST_FILE):
+    tmp_file = manifest_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, manifest_file)
+
+
+def get_vectorstore_version(vectorstore_dir=VECTORSTORE_DIR):
+    """Short hash identifying the indexed corpus; changes whenever ingestion changes the index."""
+    manifest_file = os.path.join(vectorstore_dir, os.path.basename(MANIFEST_FILE))
+    if os.path.exists(manifest_file):
+        return file_hash(manifest_file)[:16]
+    index_file = os.path.join(vectorstore_dir, INDEX_FILE)
+    stat = os.stat(index_file)
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+
+def scan_pdfs(pdf_dir=PDF_DIR):
+    """Return {filename: sha256} for every PDF in `pdf_dir`."""
+    return {
+        filename: file_hash(os.path.join(pdf_dir, filename))
+        for filename in sorted(os.listdir(pdf_dir))
+        if filename.endswith(".pdf")
+    }
+
+
+def parse_pdf(path):
+    """Load and split one PDF. Runs in a worker process."""
+    try:
+        pages = PyPDFLoader(path).load()
+        return get_splitter().split_documents(pages), None
+    except Exception as e:
+        return None, str(e)
+
+
+def parse_pdfs(paths, workers=INGEST_WORKERS):
+    if workers <= 1 or len(paths) <= 1:
+        yield from zip(paths, map(parse_pdf, paths))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from zip(paths, executor.map(parse_pdf, paths))
+
+
+def embed_in_batches(texts, embedding_model, batch_size=EMBED_BATCH_SIZE):
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        yield batch, embedding_model.embed_documents(batch)
+
+
+def ingest(
+    pdf_dir=PDF_DIR,
+    vectorstore_dir=VECTORSTORE_DIR,
+    workers=INGEST_WORKERS,
+    embedding_model=None,
+    rebuild=False,
+    index_type=INDEX_TYPE,
+    shard_by_state=SHARD_BY_STATE,
+):
+    """
+    Bring the vectorstore in `vectorstore_dir` in sync with the PDFs in `pdf_dir`
+    and return it. Returns None if there is nothing to index.
+    """
+    manifest_file = os.path.join(vectorstore_dir, os.path.basename(MANIFEST_FILE))
+    exists = store_exists(vectorstore_dir)
+    if exists and not rebuild:
+        stored_type = stored_index_type(vectorstore_dir)
+        if not os.path.exists(manifest_file):
+            # Built before manifests existed; we can't tell which vectors belong to which PDF.
+            print("No manifest found for existing vectorstore. Rebuilding...")
+            rebuild = True
+        elif is_sharded(vectorstore_dir) != shard_by_state:
+            print(f"Sharding by state turned {'on' if shard_by_state else 'off'}. Rebuilding...")
+            rebuild = True
+        elif stored_type != index_type:
+            print(f"Index type changed from {stored_type} to {index_type}. Rebuilding...")
+            rebuild = True
+    if rebuild or not exists:
+        manifest = {}
+        remove_store(vectorstore_dir)
+        exists = False
+    else:
+        manifest = load_manifest(manifest_file)
+
+    current = scan_pdfs(pdf_dir)
+    changed = [name for name, sha in current.items() if manifest.get(name, {}).get("sha256") != sha]
+    removed = [name for name in manifest if name not in current]
+    print(f"{len(current)} PDFs found: {len(changed)} new or changed, {len(removed)} removed.")
+
+    if embedding_model is None:
+        embedding_model = get_embedding_model()
+
+    # Shard name -> open store. An unsharded store is the single shard "".
+    stores = {}
+
+    def get_store(shard, dimension=None, count=0):
+        if shard not in stores:
+            path = shard_path(vectorstore_dir, shard)
+            if store_exists(path):
+                stores[shard] = VectorStore.open(path, embedding_model, read_only=False)
+            else:
+                stores[shard] = VectorStore.create(path, embedding_model, dimension, index_type, count)
+        return stores[shard]
+
+    def open_all():
+        # The single unsharded store, or every shard including those this run left untouched.
+        if not shard_by_state:
+            return get_store("")
+        for shard in list_shards(vectorstore_dir):
+            get_store(shard)
+        return ShardedStore(vectorstore_dir, embedding_model, stores)
+
+    # Stores changed since the last save.
+    touched = set()
+
+    def save():
+        os.makedirs(vectorstore_dir, exist_ok=True)
+        for shard in touched:
+            stores[shard].save()
+        touched.clear()
+        save_manifest(manifest, manifest_file)
+
+    stale_ids = defaultdict(list)
+    if exists:
+        if not changed and not removed:
+            print("Vectorstore is up to date.")
+            return open_all()
+
+        for name in changed + removed:
+            entry = manifest.pop(name, {})
+            stale_ids[entry.get("shard", "")].extend(entry.get("ids", []))
+        for shard, ids in stale_ids.items():
+            if ids:
+                get_store(shard).delete(ids)
+                touched.add(shard)
+                print(f"Removed {len(ids)} stale chunks{f' from {shard}' if shard else ''}.")
+
+    texts, metadatas, shards = [], [], []
+    parsed = []  # (name, shard, first chunk position, end position)
+    paths = [os.path.join(pdf_dir, name) for name in changed]
+    for path, (docs, error) in parse_pdfs(paths, workers):
+        name = os.path.basename(path)
+        if error is not None:
+            # Left out of the manifest so the next run retries it.
+            print(f"Skipping {name}: {error}")
+            continue
+        shard = ""
+        if shard_by_state:
+            shard = shard_name(document_state(name, [doc.page_content for doc in docs]))
+        parsed.append((name, shard, len(texts), len(texts) + len(docs)))
+        texts.extend(doc.page_content for doc in docs)
+        metadatas.extend(doc.metadata for doc in docs)
+        shards.extend([shard] * len(docs))
+
+    shard_sizes = Counter(shards)
+    embedded = train_new_stores(texts, shards, index_type, vectorstore_dir, embedding_model, get_store)
+
+    # Embed, store and save a group of PDFs at a time, recording them in the manifest
+    # only once saved, so an interrupted run resumes after the last saved group.
+    done = 0
+    for group in group_pdfs(parsed, INGEST_GROUP_CHUNKS):
+        positions = [p for _, _, first, end in group for p in range(first, end) if p not in embedded]
+        for batch_start in range(0, len(positions), EMBED_BATCH_SIZE):
+            batch = positions[batch_start:batch_start + EMBED_BATCH_SIZE]
+            embedded.update(zip(batch, embedding_model.embed_documents([texts[p] for p in batch])))
+        for name, shard, first, end in group:
+            manifest[name] = {"sha256": current[name], "ids": []}
+            if shard:
+                manifest[name]["shard"] = shard
+            if first == end:
+                continue
+            vectors = [embedded.pop(p) for p in range(first, end)]
+            store = get_store(shard, len(vectors[0]), shard_sizes[shard])
+            manifest[name]["ids"] = store.add(texts[first:end], metadatas[first:end], vectors)
+            touched.add(shard)
+        save()
+        done += sum(end - first for _, _, first, end in group)
+        print(f"Embedded and saved {done}/{len(texts)} chunks.")
+
+    if not stores:
+        print("No documents to index.")
+        return None
+
+    save()
+    print("Vectorstore saved!")
+    return open_all()
+
+
+def group_pdfs(parsed, group_chunks):
+    """Split parsed PDFs, in order, into groups of whole PDFs holding about `group_chunks` chunks."""
+    group, chunks = [], 0
+    for pdf in parsed:
+        group.append(pdf)
+        chunks += pdf[3] - pdf[2]
+        if chunks >= group_chunks:
+            yield group
+            group, chunks = [], 0
+    if group:
+        yield group
+
+
+def train_new_stores(texts, shards, index_type, vectorstore_dir, embedding_model, get_store):
+    """
+    Create and train the IVF stores this run starts from scratch, each on a
+    sample of its chunks spread over the whole run. Returns {position: vector}
+    for the sampled chunks so they aren't embedded twice.
+    """
+    embedded = {}
+    if index_type not in TRAINED_INDEX_TYPES:
+        return embedded
+    positions_by_shard = defaultdict(list)
+    for position, shard in enumerate(shards):
+        positions_by_shard[shard].append(position)
+    dimension = None
+    for shard, positions in positions_by_shard.items():
+        if store_exists(shard_path(vectorstore_dir, shard)):
+            continue
+        if dimension is None:
+            dimension = len(embedding_model.embed_query(texts[positions[0]]))
+        store = get_store(shard, dimension, len(positions))
+        sample = [positions[i] for i in training_sample(store.index, len(positions))]
+        sample_texts = [texts[p] for p in sample]
+        vectors = [vector for _, batch in embed_in_batches(sample_texts, embedding_model) for vector in batch]
+        store.train(vectors)
+        embedded.update(zip(sample, vectors))
+        print(f"Trained {shard or 'index'} on {len(sample)} of {len(positions)} chunks.")
+    return embedded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally index PDFs into the vectorstore.")
+    parser.add_argument("--pdf-dir", default=PDF_DIR)
+    parser.add_argument("--vectorstore-dir", default=VECTORSTORE_DIR)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="PDF parsing processes")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the manifest and rebuild from scratch")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=INDEX_TYPE)
+    parser.add_argument(
+        "--shard-by-state",
+        action=argparse.BooleanOptionalAction,
+        default=SHARD_BY_STATE,
+        help="Keep one index per state",
+    )
+    args = parser.parse_args()
+    with build_lock(args.vectorstore_dir):
+        ingest(
+            args.pdf_dir,
+            args.vectorstore_dir,
+            args.workers,
+            rebuild=args.rebuild,
+            index_type=args.index_type,
+            shard_by_state=args.shard_by_state,
+        )
+
+
+if __name__ == "__main__":
+    main()
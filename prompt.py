@@ -0,0 +1,140 @@
+"""
+Prompt construction for the Groq chat-completions call.
+
+The system prompt is tokenized once when the assembler is created and sent as a
+system message. Retrieved chunks are merged where they overlap or touch and
+packed into the context by relevance until the token budget is used up.
+"""
+import os
+
+from langchain_core.documents import Document
+from transformers import AutoTokenizer
+
+from config import (
+    CHUNK_OVERLAP,
+    CONTEXT_TOKEN_BUDGET,
+    MAX_ANSWER_TOKENS,
+    MODEL_CONTEXT_TOKENS,
+    PROMPT_TOKEN_MARGIN,
+    PROMPT_TOKENIZER,
+)
+
+SYSTEM_PROMPT = """I am an AI based chatbot. My name is "Jal Sandhana". You are made by Team SPAMMM. you will provide short answers of general queries in about 5 to 10 words. you should be able to answer queries related to - water level scenario, hydrogeological scenario, water quality, available reports for an area. you should generate a comprehensive report of the Area of locality on - Ground Water Resource Assessment, Categorization of the area, GW management practices to be adopted, Conditions for obtaining NOC for ground water extraction, guidance on how to obtain NOC, definition of groundwater terms, training opportunities related to ground water etc. You have to follow following commands, it contains features of the result produced by you and you are required to maintain the format of result. take text written below as an example of how should you provide results to the queries of the users.
+You are a groundwater expert. you are made to provide information related to groundwater, such as aquifers, groundwater management, resource assessment, water quality, and related practices. this line is only for you : "you can answer general questions such as "hey, hello, hi, how are you, how are you doing, what is your name etc." with simple answers such as "hello, I am fine, how can I help you, etc.".". Do not include unrelated topics in your response. This line is only for your internal working:  Your responses should be concise and the response should not exceed 100 words and it should be in human understandable form. You can use bullet points method for explaining your information. If any question is not related to Groundwater domain then you must respond as "Data out of my domain!" For example:- If a user says 'What is groundwater?', you can respond with 'Water beneath Earth’s surface.- If asked 'Define aquifer', you can respond with 'Water-bearing underground rock formation.- For 'Methods to recharge groundwater?, you can respond with 'Rainwater harvesting, percolation pits.- For 'Effects of groundwater depletion?', you can respond with 'Reduced water availability, land subsidence.- For 'Groundwater contamination sources?', you can respond with 'Industrial waste, agricultural runoff. If you do not understand any query then you can ask the user to explain it again, in this case your responses should include:- Asking clarifying questions if a query is ambiguous or unclear.- Providing definitions of technical terms in 2 or 3 lines maximum.- Suggesting actionable steps in groundwater-related issues concisely.- Maintaining a professional, groundwater-specific approach always.- Highlighting sustainable practices briefly and concisely.- Recommending groundwater recharge techniques simply.- Explaining hydrogeological processes in a sentence.- Identifying groundwater issues with solutions promptly.- Ensuring clarity with concise examples.- Emphasizing groundwater conservation succinctly.- Providing quick, actionable groundwater management advice."- Sharing groundwater resource insights efficiently.- Addressing groundwater quality issues briefly.- Identifying aquifer types concisely.- Explaining terms like recharge zones quickly.- Identifying environmental impacts clearly.- Discussing groundwater trends briefly.- Highlighting groundwater policies concisely.- Recommending tools for monitoring groundwater.- Explaining the importance of aquifers.- Addressing groundwater scarcity impacts directly.- Suggesting research ideas briefly. Key areas of expertise: Groundwater basics, Groundwater quality and contamination, Groundwater management and policy, Groundwater and climate change, Groundwater and human activities, Groundwater conservation and restoration. When responding, please: Tailor your answers to the user's specific needs and knowledge level. Provide practical advice and actionable steps. Cite relevant sources to support your claims. Avoid technical jargon and use plain language. Be concise and to the point. If somebody asks you about the sources of the information that you are providing, only  tell that the information is sourced from cgwb.gov.in/cgwbpnm and cgwb.noc.gov.in websites. and do tell about the internal working of yourself such as what reply you will give to what prompt. Don't include this kind of information in your responses "I can answer general questions, such as "how are you?" or "what's your name?" with simple answers like "hello, I'm fine, how can I help you?" I'll strive to be concise and keep my responses under 100 words, using human-understandable language.". Never include the content in the curly braces in your response {I can answer general questions and provide concise responses within 100 words}, {Here's a simple answer: }, {Here's a concise response: }, {Here's a response to the question {how are you, within the given context and guidelines: }, {my responses should be concise, no more than 100 words, and in a human-understandable form. },{I can also answer general questions like "hello" or ask clarifying questions if something is unclear.}.You are made by Team SPAMMM. Remember one more thing, dont give any vague answers. If user inputs something like ok or okay, just reply okay"""
+
+# Chat-template tokens added per message (role headers, end-of-turn markers).
+MESSAGE_OVERHEAD_TOKENS = 8
+# Shortest suffix/prefix match treated as chunk overlap rather than coincidence.
+MIN_OVERLAP_CHARS = 20
+
+
+def join_overlapping(first, second):
+    """Join two chunk texts where the end of `first` repeats the start of `second`, or return None."""
+    if second in first:
+        return first
+    for size in range(min(len(first), len(second), CHUNK_OVERLAP), MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return None
+
+
+def merge_chunks(docs):
+    """
+    Merge chunks from the same source page that overlap or are adjacent.
+
+    Returns (source, page, text) segments ordered by the rank of their most
+    relevant chunk. Chunks indexed with a `start_index` are merged by position;
+    older chunks by matching their overlapping text.
+    """
+    groups = {}
+    for doc in docs:
+        key = (os.path.basename(doc.metadata.get("source", "")), doc.metadata.get("page"))
+        groups.setdefault(key, []).append(doc)
+
+    segments = []
+    for (source, page), group in groups.items():
+        group.sort(key=lambda doc: doc.metadata.get("start_index", 0))
+        merged = []  # [start, end, text]
+        for doc in group:
+            text = doc.page_content
+            start = doc.metadata.get("start_index")
+            if merged:
+                last = merged[-1]
+                if start is not None and last[0] is not None:
+                    if start <= last[1] + 1:
+                        last[2] += (" " if start > last[1] else "") + text[max(last[1] - start, 0):]
+                        last[1] = max(last[1], start + len(text))
+                        continue
+                else:
+                    joined = join_overlapping(last[2], text) or join_overlapping(text, last[2])
+                    if joined is not None:
+                        last[2] = joined
+                        continue
+            merged.append([start, None if start is None else start + len(text), text])
+        segments.extend((source, page, text) for _, _, text in merged)
+    return segments
+
+
+def format_context(segments):
+    parts = []
+    for source, page, text in segments:
+        label = source or "Document"
+        if page is not None:
+            label += f", p. {page + 1}"
+        parts.append(f"[{label}]\n{text}")
+    return "\n\n".join(parts)
+
+
+class PromptAssembler:
+    def __init__(self, tokenizer_name=PROMPT_TOKENIZER):
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        # Only counting tokens; silence the warning about inputs longer than the model limit.
+        self.tokenizer.model_max_length = 1 << 30
+        self.system_tokens = self.count_tokens(SYSTEM_PROMPT) + MESSAGE_OVERHEAD_TOKENS
+
+    def count_tokens(self, text):
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def user_message(self, context, question):
+        return f"Context:\n{context}\n\nQuestion: {question}"
+
+    def context_budget(self, question):
+        available = int((MODEL_CONTEXT_TOKENS - MAX_ANSWER_TOKENS) * (1 - PROMPT_TOKEN_MARGIN))
+        available -= self.system_tokens + self.count_tokens(self.user_message("", question)) + MESSAGE_OVERHEAD_TOKENS
+        return max(min(CONTEXT_TOKEN_BUDGET, available), 0)
+
+    def assemble(self, docs, question):
+        """
+        Pack `docs` (most relevant first) into a context that fits the token budget.
+        Returns (used_docs, context, prompt_tokens), where prompt_tokens estimates the
+        size of the full prompt including the system message.
+        """
+        budget = self.context_budget(question)
+        used = []
+        context = ""
+        for doc in docs:
+            candidate = format_context(merge_chunks(used + [doc]))
+            if self.count_tokens(candidate) <= budget:
+                used.append(doc)
+                context = candidate
+
+        if not used and docs and budget:
+            # Even the most relevant chunk alone is over budget: keep its beginning.
+            text = docs[0].page_content
+            while text:
+                truncated = Document(page_content=text, metadata=docs[0].metadata)
+                candidate = format_context(merge_chunks([truncated]))
+                if self.count_tokens(candidate) <= budget:
+                    used = [truncated]
+                    context = candidate
+                    break
+                text = text[: int(len(text) * 0.9)]
+
+        user_tokens = self.count_tokens(self.user_message(context, question)) + MESSAGE_OVERHEAD_TOKENS
+        return used, context, self.system_tokens + user_tokens
+
+    def messages(self, context, question):
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": self.user_message(context, question)},
+        ]
@@ -0,0 +1,576 @@
+"""
+On-disk vectorstore: a FAISS index plus a SQLite chunk store.
+
+Vectors live in `index.faiss`, keyed by the integer row id of their chunk in
+`docstore.sqlite`. The app opens the index memory-mapped and read-only, so
+uvicorn workers share its pages, and fetches chunk texts from SQLite only for
+the ids a search returns instead of unpickling every chunk into memory.
+
+The docstore also holds the tags computed at index time (see tags.py) and an
+FTS5 full-text index over chunk texts. `hybrid_search` pre-filters both the
+FAISS and the BM25 search by those tags and fuses their rankings.
+
+The index is exact (flat) by default; ingestion can instead build an IVF-Flat,
+HNSW or IVF-PQ index (INDEX_TYPE in config.py). With SHARD_BY_STATE each state
+gets its own store under `shards/`, and `ShardedStore` routes questions naming
+a state to that state's shard.
+"""
+import json
+import math
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from collections import defaultdict
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+
+from config import (
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+    HNSW_M,
+    INDEX_TYPE,
+    IVF_NLIST,
+    IVF_NPROBE,
+    PQ_M,
+    PQ_NBITS,
+    RETRIEVAL_FETCH_K,
+    RETRIEVAL_MAX_FETCH_K,
+    RRF_K,
+)
+from metrics import STAGE_SECONDS
+from tags import STATE_NAMES, chunk_regions, find_regions, is_groundwater
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+SCHEMA_VERSION = 1
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+TRAINED_INDEX_TYPES = ("ivf", "ivfpq")  # must be trained before vectors are added
+# k-means wants 39 to 256 training points per centroid; more only slows training down.
+TRAIN_POINTS_PER_CENTROID = 64
+
+SHARDS_DIR = "shards"
+GENERAL_SHARD = "general"  # PDFs that name no state
+
+SCHEMA = """
+CREATE TABLE chunks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    groundwater INTEGER NOT NULL
+);
+CREATE TABLE chunk_regions (chunk_id INTEGER NOT NULL, region TEXT NOT NULL);
+CREATE INDEX chunk_regions_region ON chunk_regions (region);
+CREATE VIRTUAL TABLE chunks_fts USING fts5 (text, content='chunks', content_rowid='id');
+CREATE TRIGGER chunks_insert AFTER INSERT ON chunks BEGIN
+    INSERT INTO chunks_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER chunks_delete AFTER DELETE ON chunks BEGIN
+    INSERT INTO chunks_fts (chunks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    DELETE FROM chunk_regions WHERE chunk_id = old.id;
+END;
+"""
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or our should "
+    "the their there this to was what when where which who why will with you your".split()
+)
+
+# Newer FAISS releases can mmap the codes of flat indexes; older ones only honour IO_FLAG_MMAP.
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+if not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+    print(
+        f"Warning: FAISS {faiss.__version__} can only memory-map IVF indexes; flat and HNSW indexes "
+        "are read into memory by every worker. Upgrade faiss-cpu to share them."
+    )
+
+
+def store_exists(directory):
+    """True if `directory` holds a store, or shards of one, in the current format."""
+    if is_sharded(directory):
+        return bool(list_shards(directory))
+    if not all(os.path.exists(os.path.join(directory, name)) for name in (INDEX_FILE, DOCSTORE_FILE)):
+        return False
+    connection = sqlite3.connect(f"file:{os.path.join(directory, DOCSTORE_FILE)}?mode=ro", uri=True)
+    try:
+        return connection.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    finally:
+        connection.close()
+
+
+def is_sharded(directory):
+    return os.path.isdir(os.path.join(directory, SHARDS_DIR))
+
+
+def list_shards(directory):
+    shards_dir = os.path.join(directory, SHARDS_DIR)
+    return sorted(name for name in os.listdir(shards_dir) if store_exists(os.path.join(shards_dir, name)))
+
+
+def shard_name(state):
+    return state.replace(" ", "-") if state else GENERAL_SHARD
+
+
+def shard_path(directory, shard):
+    """Directory of `shard` of the store in `directory`; the empty name stands for an unsharded store."""
+    return os.path.join(directory, SHARDS_DIR, shard) if shard else directory
+
+
+def remove_store(directory):
+    shutil.rmtree(os.path.join(directory, SHARDS_DIR), ignore_errors=True)
+    for name in (INDEX_FILE, DOCSTORE_FILE):
+        if os.path.exists(os.path.join(directory, name)):
+            os.remove(os.path.join(directory, name))
+
+
+def open_store(directory, embeddings, read_only=True):
+    """Open the store in `directory`, sharded or not."""
+    if is_sharded(directory):
+        return ShardedStore.open(directory, embeddings, read_only)
+    return VectorStore.open(directory, embeddings, read_only)
+
+
+def make_index(
+    index_type,
+    dimension,
+    count,
+    nlist=IVF_NLIST,
+    hnsw_m=HNSW_M,
+    ef_construction=HNSW_EF_CONSTRUCTION,
+    pq_m=PQ_M,
+    pq_nbits=PQ_NBITS,
+):
+    """
+    Empty FAISS index of `index_type` for about `count` vectors, keyed by chunk id.
+
+    IVF indexes take ids natively; flat and HNSW ones are wrapped in an id map.
+    The number of IVF lists and PQ centroids is capped so that `count` vectors
+    are enough to train them.
+    """
+    if index_type == "flat":
+        return faiss.index_factory(dimension, "IDMap,Flat")
+    if index_type == "hnsw":
+        index = faiss.index_factory(dimension, f"IDMap2,HNSW{hnsw_m}")
+        faiss.downcast_index(index.index).hnsw.efConstruction = ef_construction
+        return index
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of: {', '.join(INDEX_TYPES)}")
+
+    nlist = max(1, min(nlist or int(4 * math.sqrt(count)), count // 39))
+    if index_type == "ivf":
+        return faiss.index_factory(dimension, f"IVF{nlist},Flat")
+    if dimension % pq_m:
+        raise ValueError(f"PQ_M={pq_m} does not divide the embedding dimension {dimension}")
+    pq_nbits = max(1, min(pq_nbits, int(math.log2(max(count, 2)))))
+    # "np" skips polysemous training, which takes minutes and only helps Hamming-distance search.
+    return faiss.index_factory(dimension, f"IVF{nlist},PQ{pq_m}x{pq_nbits}np")
+
+
+def base_index(index):
+    """The index doing the search, below any id map."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def get_index_type(index):
+    base = base_index(index)
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(base, faiss.IndexIVF):
+        return "ivf"
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def stored_index_type(directory):
+    if is_sharded(directory):
+        directory = shard_path(directory, list_shards(directory)[0])
+    return get_index_type(faiss.read_index(os.path.join(directory, INDEX_FILE), MMAP_FLAGS))
+
+
+def set_search_params(index, nprobe=IVF_NPROBE, ef_search=HNSW_EF_SEARCH):
+    """Set how much of an approximate index a search visits; flat indexes are left alone."""
+    base = base_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = min(nprobe, base.nlist)
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = ef_search
+
+
+def training_size(index, count):
+    """Vectors to train `index` on: enough for its centroids, or all `count` if fewer."""
+    base = base_index(index)
+    centroids = base.nlist if isinstance(base, faiss.IndexIVF) else 1
+    if isinstance(base, faiss.IndexIVFPQ):
+        centroids = max(centroids, base.pq.ksub)
+    return min(count, centroids * TRAIN_POINTS_PER_CENTROID)
+
+
+def training_sample(index, count, seed=0):
+    """
+    Sorted positions, out of `count` vectors to be indexed, of a uniform random
+    sample to train `index` on. Sampling the whole build keeps the centroids
+    from fitting only the PDFs that happen to come first.
+    """
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(count, training_size(index, count), replace=False))
+
+
+def fts_query(question):
+    """Turn a question into an FTS5 OR-query of its quoted, non-stopword terms."""
+    words = [word for word in re.findall(r"\w+", question.lower()) if word not in STOPWORDS]
+    return " OR ".join(f'"{word}"' for word in dict.fromkeys(words))
+
+
+def fuse(rankings, rrf_k=RRF_K):
+    """Reciprocal rank fusion of several ranked id lists."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (rrf_k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class VectorStore:
+    def __init__(self, directory, embeddings, index, read_only):
+        self.directory = directory
+        self.embeddings = embeddings
+        self.read_only = read_only
+        self.docstore_path = os.path.join(directory, DOCSTORE_FILE)
+        self._local = threading.local()
+        self._selectors = {}
+        self._set_index(index)
+
+    def _set_index(self, index):
+        self.index = index
+        self.base = base_index(index)
+        set_search_params(index)
+        # Approximate indexes can return fewer than k hits under a selective filter.
+        self.exact = isinstance(self.base, faiss.IndexFlat)
+
+    @classmethod
+    def open(cls, directory, embeddings, read_only=True):
+        """Open an existing store. Read-only stores mmap the index."""
+        path = os.path.join(directory, INDEX_FILE)
+        index = faiss.read_index(path, MMAP_FLAGS) if read_only else faiss.read_index(path)
+        return cls(directory, embeddings, index, read_only)
+
+    @classmethod
+    def create(cls, directory, embeddings, dimension, index_type=INDEX_TYPE, count=0):
+        """Create an empty store whose index is sized for about `count` vectors."""
+        os.makedirs(directory, exist_ok=True)
+        for name in (INDEX_FILE, DOCSTORE_FILE):
+            if os.path.exists(os.path.join(directory, name)):
+                os.remove(os.path.join(directory, name))
+        index = make_index(index_type, dimension, count)
+        store = cls(directory, embeddings, index, read_only=False)
+        store.db.executescript(SCHEMA)
+        store.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        store.db.commit()
+        return store
+
+    @property
+    def db(self):
+        # One connection per thread: searches run on the retrieval thread pool.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self.read_only:
+                connection = sqlite3.connect(f"file:{self.docstore_path}?mode=ro", uri=True)
+            else:
+                connection = sqlite3.connect(self.docstore_path)
+            self._local.connection = connection
+        return connection
+
+    def __len__(self):
+        return self.index.ntotal
+
+    def add(self, texts, metadatas, vectors):
+        """Store and tag chunks and their vectors; returns the ids assigned to them."""
+        ids = []
+        for text, metadata in zip(texts, metadatas):
+            cursor = self.db.execute(
+                "INSERT INTO chunks (text, metadata, groundwater) VALUES (?, ?, ?)",
+                (text, json.dumps(metadata), int(is_groundwater(text))),
+            )
+            ids.append(cursor.lastrowid)
+            self.db.executemany(
+                "INSERT INTO chunk_regions (chunk_id, region) VALUES (?, ?)",
+                [(cursor.lastrowid, region) for region in chunk_regions(text, metadata)],
+            )
+        self.index.add_with_ids(np.asarray(vectors, dtype=np.float32), np.asarray(ids, dtype=np.int64))
+        return ids
+
+    def train(self, vectors):
+        """Train an IVF index, before any vectors are added; see `training_sample`."""
+        self.index.train(np.asarray(vectors, dtype=np.float32))
+
+    def delete(self, ids):
+        if not ids:
+            return
+        self.db.executemany("DELETE FROM chunks WHERE id = ?", [(i,) for i in ids])
+        if isinstance(self.base, faiss.IndexHNSW):
+            self._rebuild_hnsw(np.asarray(ids, dtype=np.int64))
+        else:
+            self.index.remove_ids(np.asarray(ids, dtype=np.int64))
+
+    def _rebuild_hnsw(self, removed):
+        """HNSW graphs don't support removal: rebuild the graph from the remaining stored vectors."""
+        ids = faiss.vector_to_array(self.index.id_map)
+        vectors = self.base.reconstruct_n(0, self.index.ntotal)
+        keep = ~np.isin(ids, removed)
+        index = make_index(
+            "hnsw",
+            self.index.d,
+            int(keep.sum()),
+            hnsw_m=self.base.hnsw.nb_neighbors(1),
+            ef_construction=self.base.hnsw.efConstruction,
+        )
+        index.add_with_ids(vectors[keep], ids[keep])
+        self._set_index(index)
+
+    def save(self):
+        """Commit the chunk store and atomically replace the index file."""
+        path = os.path.join(self.directory, INDEX_FILE)
+        faiss.write_index(self.index, path + ".tmp")
+        self.db.commit()
+        os.replace(path + ".tmp", path)
+
+    def get_documents(self, ids):
+        """Fetch chunks by id, in the given order. Ids missing from the docstore are skipped."""
+        ids = [int(i) for i in ids if i != -1]
+        by_id = self.get_documents_by_id(ids)
+        return [by_id[i] for i in ids if i in by_id]
+
+    def get_documents_by_id(self, ids):
+        """Fetch chunks as {id: document}; ids missing from the docstore are left out."""
+        ids = [int(i) for i in ids if i != -1]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with STAGE_SECONDS.time(stage="docstore_fetch"):
+            rows = self.db.execute(
+                f"SELECT id, text, metadata FROM chunks WHERE id IN ({placeholders})", ids
+            ).fetchall()
+        return {row[0]: Document(page_content=row[1], metadata=json.loads(row[2])) for row in rows}
+
+    def search(self, embedding, k):
+        return self.search_batch([embedding], k)[0]
+
+    def search_batch(self, embeddings, k):
+        """Search once for a matrix of query embeddings; returns one document list per query."""
+        _, indices = self.index.search(np.asarray(embeddings, dtype=np.float32), k)
+        return [self.get_documents(row) for row in indices]
+
+    def _selector(self, regions):
+        """FAISS id selector for groundwater chunks, restricted to `regions` if given. Cached per region set."""
+        selector = self._selectors.get(regions)
+        if selector is None:
+            with STAGE_SECONDS.time(stage="filter"):
+                selector = self._build_selector(regions)
+            if len(self._selectors) >= 256:
+                self._selectors.clear()
+            self._selectors[regions] = selector
+        return selector
+
+    def _build_selector(self, regions):
+        if regions:
+            placeholders = ",".join("?" * len(regions))
+            rows = self.db.execute(
+                "SELECT DISTINCT chunks.id FROM chunks JOIN chunk_regions ON chunk_regions.chunk_id = chunks.id "
+                f"WHERE chunks.groundwater = 1 AND chunk_regions.region IN ({placeholders})",
+                sorted(regions),
+            ).fetchall()
+        else:
+            rows = self.db.execute("SELECT id FROM chunks WHERE groundwater = 1").fetchall()
+        return faiss.IDSelectorBatch(np.asarray([row[0] for row in rows], dtype=np.int64))
+
+    def _search_params(self, selector, k):
+        # Widen IVF probes and the HNSW beam along with k when a filtered search is retried.
+        scale = max(1, k // RETRIEVAL_FETCH_K)
+        if isinstance(self.base, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=min(self.base.nprobe * scale, self.base.nlist))
+        if isinstance(self.base, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=max(self.base.hnsw.efSearch * scale, k))
+        return faiss.SearchParameters(sel=selector)
+
+    def _vector_search(self, embeddings, k, regions):
+        """(id, L2 distance) of the nearest chunks, per query."""
+        params = self._search_params(self._selector(regions), k)
+        with STAGE_SECONDS.time(stage="faiss_search"):
+            distances, indices = self.index.search(embeddings, k, params=params)
+        return [
+            [(int(i), float(distance)) for i, distance in zip(row, row_distances) if i != -1]
+            for row, row_distances in zip(indices, distances)
+        ]
+
+    def _lexical_search(self, question, k, regions):
+        """(id, BM25 score) of the best matching chunks; lower scores are better."""
+        query = fts_query(question)
+        if not query:
+            return []
+        sql = (
+            "SELECT chunks.id, bm25(chunks_fts) FROM chunks_fts JOIN chunks ON chunks.id = chunks_fts.rowid "
+            "WHERE chunks_fts MATCH ? AND chunks.groundwater = 1"
+        )
+        args = [query]
+        if regions:
+            placeholders = ",".join("?" * len(regions))
+            sql += f" AND chunks.id IN (SELECT chunk_id FROM chunk_regions WHERE region IN ({placeholders}))"
+            args.extend(sorted(regions))
+        sql += " ORDER BY bm25(chunks_fts) LIMIT ?"
+        args.append(k)
+        with STAGE_SECONDS.time(stage="bm25_search"):
+            return self.db.execute(sql, args).fetchall()
+
+    def hybrid_search(self, question, embedding, k):
+        return self.hybrid_search_batch([question], [embedding], k)[0]
+
+    def hybrid_search_batch(self, questions, embeddings, k):
+        """Return up to k groundwater chunks per question, fusing FAISS and BM25 rankings."""
+        return [self.get_documents([hit[0] for hit in hits]) for hits in self.hybrid_hits(questions, embeddings, k)]
+
+    def hybrid_hits(self, questions, embeddings, k):
+        """
+        Return up to k (id, distance, bm25) hits per question in fused order. The
+        FAISS distance or BM25 score is None for chunks only the other retriever found.
+
+        Questions naming a known region are first restricted to chunks tagged with
+        it; if that yields fewer than k chunks the search is widened to all
+        groundwater chunks. Approximate indexes that come back short are retried
+        with a larger fetch size and a wider probe. Questions sharing a filter
+        share one FAISS call.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        results = [[] for _ in questions]
+        distances = [{} for _ in questions]
+        scores = [{} for _ in questions]
+        pending = [(i, frozenset(find_regions(question)), RETRIEVAL_FETCH_K) for i, question in enumerate(questions)]
+        while pending:
+            groups = defaultdict(list)
+            for i, regions, fetch_k in pending:
+                groups[(regions, fetch_k)].append(i)
+            pending = []
+            for (regions, fetch_k), members in groups.items():
+                vector_rankings = self._vector_search(embeddings[members], fetch_k, regions)
+                for i, vector_hits in zip(members, vector_rankings):
+                    lexical_hits = self._lexical_search(questions[i], fetch_k, regions)
+                    distances[i].update(vector_hits)
+                    scores[i].update(lexical_hits)
+                    found = set(results[i])
+                    rankings = [[doc_id for doc_id, _ in vector_hits], [doc_id for doc_id, _ in lexical_hits]]
+                    results[i].extend(doc_id for doc_id in fuse(rankings) if doc_id not in found)
+                    del results[i][k:]
+                    if len(results[i]) >= k:
+                        continue
+                    if not self.exact and len(vector_hits) < fetch_k and fetch_k < RETRIEVAL_MAX_FETCH_K:
+                        pending.append((i, regions, min(fetch_k * 4, RETRIEVAL_MAX_FETCH_K)))
+                    elif regions:
+                        pending.append((i, frozenset(), fetch_k))
+        return [
+            [(doc_id, distances[i].get(doc_id), scores[i].get(doc_id)) for doc_id in ids]
+            for i, ids in enumerate(results)
+        ]
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class ShardedStore:
+    """
+    One VectorStore per state under `<directory>/shards/`, plus a general shard
+    for PDFs that name no state. Questions naming states are searched in those
+    states' shards and the general one; other questions in every shard.
+    """
+
+    def __init__(self, directory, embeddings, shards):
+        self.directory = directory
+        self.embeddings = embeddings
+        self.shards = shards
+
+    @classmethod
+    def open(cls, directory, embeddings, read_only=True):
+        shards = {
+            name: VectorStore.open(shard_path(directory, name), embeddings, read_only)
+            for name in list_shards(directory)
+        }
+        return cls(directory, embeddings, shards)
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards.values())
+
+    def route(self, question):
+        """Names of the shards to search for `question`."""
+        named = {shard_name(state) for state in find_regions(question) & STATE_NAMES} & self.shards.keys()
+        if not named:
+            return sorted(self.shards)
+        return sorted(named | ({GENERAL_SHARD} & self.shards.keys()))
+
+    def hybrid_search(self, question, embedding, k):
+        return self.hybrid_search_batch([question], [embedding], k)[0]
+
+    def hybrid_search_batch(self, questions, embeddings, k):
+        """
+        Search the shards each question is routed to. If they hold fewer than k
+        matching chunks, the rest are filled from the other shards.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        routes = [self.route(question) for question in questions]
+        results = self._search_shards(questions, embeddings, k, routes)
+        short = [i for i, docs in enumerate(results) if len(docs) < k and len(routes[i]) < len(self.shards)]
+        if short:
+            others = [sorted(self.shards.keys() - set(routes[i])) for i in short]
+            widened = self._search_shards([questions[i] for i in short], embeddings[short], k, others)
+            for i, docs in zip(short, widened):
+                results[i].extend(docs[:k - len(results[i])])
+        return results
+
+    def _search_shards(self, questions, embeddings, k, routes):
+        """
+        Search each question's shards (one batch per shard) and fuse their hits.
+        FAISS distances share one embedding space, so the shards' vector hits are
+        merged by distance; BM25 scores, computed against each shard's own term
+        statistics, are merged as if comparable.
+        """
+        members = defaultdict(list)
+        for i, names in enumerate(routes):
+            for name in names:
+                members[name].append(i)
+
+        hits = [[] for _ in questions]
+        for name, shard_members in members.items():
+            shard_hits = self.shards[name].hybrid_hits(
+                [questions[i] for i in shard_members], embeddings[shard_members], k
+            )
+            for i, question_hits in zip(shard_members, shard_hits):
+                hits[i].extend(((name, doc_id), distance, score) for doc_id, distance, score in question_hits)
+
+        results = []
+        for question_hits in hits:
+            vector_hits = [hit for hit in question_hits if hit[1] is not None]
+            lexical_hits = [hit for hit in question_hits if hit[2] is not None]
+            rankings = [
+                [key for key, _, _ in sorted(vector_hits, key=lambda hit: hit[1])],
+                [key for key, _, _ in sorted(lexical_hits, key=lambda hit: hit[2])],
+            ]
+            top = fuse(rankings)[:k]
+            ids = defaultdict(list)
+            for name, doc_id in top:
+                ids[name].append(doc_id)
+            docs = {name: self.shards[name].get_documents_by_id(shard_ids) for name, shard_ids in ids.items()}
+            # Hits whose chunk is missing from its shard's docstore are dropped, as in VectorStore.get_documents.
+            results.append([docs[name][doc_id] for name, doc_id in top if doc_id in docs[name]])
+        return results
+
+    def close(self):
+        for shard in self.shards.values():
+            shard.close()
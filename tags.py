@@ -0,0 +1,84 @@
+"""
+Domain and region tags, computed once per chunk at index time.
+
+Retrieval uses them as pre-filters (see store.py) instead of scanning chunk
+texts on every request.
+"""
+import os
+import re
+from collections import Counter
+
+from config import REGIONS_FILE
+
+# A chunk is tagged as groundwater-related if it mentions any of these.
+GROUNDWATER_TERMS = (
+    "groundwater",
+    "ground water",
+    "aquifer",
+    "water table",
+    "water level",
+    "recharge",
+    "hydrogeolog",
+    "borewell",
+    "tubewell",
+    "cgwb",
+)
+
+STATES = (
+    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat",
+    "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh",
+    "Maharashtra", "Manipur", "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan",
+    "Sikkim", "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal",
+    "Andaman and Nicobar Islands", "Chandigarh", "Dadra and Nagar Haveli and Daman and Diu",
+    "Delhi", "Jammu and Kashmir", "Ladakh", "Lakshadweep", "Puducherry",
+)
+
+STATE_NAMES = frozenset(state.lower() for state in STATES)
+
+
+def load_regions(regions_file=REGIONS_FILE):
+    """States and union territories, plus any names (districts, blocks) listed one per line in `regions_file`."""
+    regions = list(STATES)
+    if regions_file and os.path.exists(regions_file):
+        with open(regions_file, encoding="utf-8") as f:
+            regions.extend(line.strip() for line in f if line.strip())
+    return regions
+
+
+REGIONS = load_regions()
+_REGION_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(region.lower()) for region in sorted(REGIONS, key=len, reverse=True)) + r")\b"
+)
+
+
+def is_groundwater(text):
+    text = text.lower()
+    return any(term in text for term in GROUNDWATER_TERMS)
+
+
+def find_regions(text):
+    """Return the set of known region names (lower-cased) mentioned in `text`."""
+    return set(_REGION_PATTERN.findall(text.lower()))
+
+
+def _source_name(source):
+    return os.path.basename(source).replace("_", " ").replace("-", " ")
+
+
+def chunk_regions(text, metadata):
+    """Regions a chunk is about: those named in its text or in its source file name."""
+    return find_regions(text) | find_regions(_source_name(metadata.get("source", "")))
+
+
+def document_state(source, texts):
+    """
+    The state (lower-cased) a PDF is about: the one in its file name, else the
+    one its text names most often. None if it names no state.
+    """
+    named = sorted(find_regions(_source_name(source)) & STATE_NAMES)
+    if named:
+        return named[0]
+    mentions = Counter(
+        region for text in texts for region in _REGION_PATTERN.findall(text.lower()) if region in STATE_NAMES
+    )
+    return mentions.most_common(1)[0][0] if mentions else None